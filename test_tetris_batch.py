@@ -0,0 +1,47 @@
+import numpy as np
+
+from tetris_batch import BatchTetris
+from tetris_core import PieceSource, Tetris
+
+############################################################
+# BATCH ENGINE
+############################################################
+
+
+def play_both(width, height, policy, games=32, steps=1500):
+    ''' plays the same random actions with BatchTetris.step and
+        Tetris.do_move and checks after every step that each game has
+        the same rows, lines, pieces and game over
+        Return value: type: tuple - (lines, games over) of the batch
+    '''
+    seeds = list(range(100, 100 + games))
+    batch = BatchTetris(seeds, width, height, policy)
+    scalar = [Tetris(seed=seed, width=width, height=height, policy=policy)
+              for seed in seeds]
+    actions = np.random.RandomState(width).choice(
+        [BatchTetris.LEFT, BatchTetris.RIGHT, BatchTetris.DOWN, BatchTetris.DOWN,
+         BatchTetris.UP], size=(steps, games))
+    for t in range(0, steps):
+        batch.step(actions[t])
+        for i, game in enumerate(scalar):
+            if game.board.over:
+                continue
+            game.do_move(BatchTetris.ACTIONS[actions[t, i]])
+            assert game.board.bits.rows == batch.rows[i].tolist(), \
+                "game %d step %d: rows" % (i, t)
+            assert game.lines == batch.lines[i]
+            assert game.pieces == batch.pieces[i]
+            assert game.board.over == batch.over[i]
+    return int(batch.lines.sum()), int(batch.over.sum())
+
+
+def test_batch_matches_tetris():
+    for policy in PieceSource.POLICIES:
+        lines, over = play_both(Tetris.BOARD_WIDTH, Tetris.BOARD_HEIGHT, policy)
+        assert over > 0
+
+
+def test_batch_matches_tetris_with_clears():
+    for policy in PieceSource.POLICIES:
+        lines, over = play_both(4, 12, policy)
+        assert lines > 0 and over > 0
@@ -0,0 +1,120 @@
+from random import Random
+
+from tetris_core import Board, Tetris
+
+############################################################
+# ENGINES
+############################################################
+
+KEYS = ['Left', 'Right', 'Down', 'Down', 'Up', 'space']
+
+
+def grid_rows(board):
+    ''' Parameter: board - type: Board
+        Return value: type: list of int - one bitmask per row, from grid
+    '''
+    rows = [0] * board.height
+    for x, y in board.grid:
+        rows[y] |= 1 << x
+    return rows
+
+
+def grid_colors(board):
+    ''' Parameter: board - type: Board
+        Return value: type: dict - (x, y) -> color of the blocks in grid
+    '''
+    return dict((cell, block.color) for cell, block in board.grid.items())
+
+
+def play_both(seed, width, height, moves):
+    ''' plays the same random keys on a 'dict' game, a headless
+        'bitboard' game and a 'bitboard' game with the Block mirror, all
+        of the same seed, and checks after every move that the boards
+        hold the same colors, tops and hash, that the bitboards' rows
+        agree with the blocks and the mirror with the dict's blocks
+    '''
+    games = [Tetris('dict', seed, width, height), Tetris('bitboard', seed, width, height),
+             Tetris('bitboard', seed, width, height, mirror=True)]
+    rng = Random(seed)
+    for i in range(0, moves):
+        key = rng.choice(KEYS)
+        for game in games:
+            game.do_move(key)
+        slow, fast, mirrored = games
+        assert fast.board.grid is None
+        assert grid_colors(slow.board) == grid_colors(mirrored.board), \
+            "seed %d move %d: grid" % (seed, i)
+        for game in (fast, mirrored):
+            assert game.board.colors == slow.board.colors, "seed %d move %d: colors" % (seed, i)
+            assert game.board.bits.rows == grid_rows(slow.board), \
+                "seed %d move %d: rows" % (seed, i)
+            assert slow.board.tops == game.board.tops, "seed %d move %d: tops" % (seed, i)
+            assert slow.board.hash == game.board.hash, "seed %d move %d: hash" % (seed, i)
+            assert ([(block.x, block.y) for block in slow.current_shape.blocks]
+                    == [(block.x, block.y) for block in game.current_shape.blocks])
+            assert slow.lines == game.lines and slow.board.over == game.board.over
+        if slow.board.over:
+            break
+    return games[0]
+
+
+def test_engines_agree():
+    for seed in range(0, 20):
+        play_both(seed, Tetris.BOARD_WIDTH, Tetris.BOARD_HEIGHT, 2000)
+
+
+def test_engines_agree_on_narrow_boards():
+    # narrow boards clear rows often and fill up fast
+    over = 0
+    lines = 0
+    for seed in range(0, 20):
+        game = play_both(seed, 4, 12, 2000)
+        over += game.board.over
+        lines += game.lines
+    assert over > 0 and lines > 0
+
+
+def test_hard_drop_matches_down():
+    # 'space' locks the shape where pressing 'Down' until it locks would
+    lines = 0
+    for seed in range(0, 10):
+        dropped = Tetris(seed=seed, width=4)
+        stepped = Tetris(seed=seed, width=4)
+        rng = Random(seed)
+        for piece in range(0, 100):
+            for i in range(0, rng.randrange(0, 8)):
+                key = rng.choice(['Left', 'Right', 'Up'])
+                dropped.do_move(key)
+                stepped.do_move(key)
+            dropped.do_move('space')
+            while stepped.pieces == piece and stepped.do_move('Down'):
+                pass
+            assert stepped.pieces == dropped.pieces == piece + 1
+            assert stepped.board.colors == dropped.board.colors, \
+                "seed %d piece %d" % (seed, piece)
+            assert stepped.board.hash == dropped.board.hash
+            assert stepped.lines == dropped.lines
+            if dropped.board.over:
+                break
+        lines += dropped.lines
+    assert lines > 0
+
+
+def test_tops_match_grid():
+    lines = 0
+    for engine in Board.ENGINES:
+        for seed in range(0, 10):
+            game = Tetris(engine, seed, 4, 12, mirror=True)
+            board = game.board
+            rng = Random(seed)
+            for i in range(0, 1000):
+                game.do_move(rng.choice(KEYS + ['space']))
+                tops = [board.height] * board.width
+                for x, y in board.grid:
+                    tops[x] = min(tops[x], y)
+                assert board.tops == tops, "%s seed %d move %d" % (engine, seed, i)
+                assert board.highest == min(tops)
+                if board.over:
+                    break
+            lines += game.lines
+    assert lines > 0
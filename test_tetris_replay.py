@@ -0,0 +1,70 @@
+from random import Random
+
+from tetris_core import PieceSource, Tetris
+from tetris_replay import EVENTS, HEADER, POLICY, Replay, ReplayLog
+
+############################################################
+# REPLAYS
+############################################################
+
+
+def game_state(game):
+    ''' Parameter: game - type: Tetris
+        Return value: type: tuple - what a replay has to give back
+    '''
+    return (list(game.board.colors), list(game.board.tops), game.board.over,
+            game.lines, game.pieces,
+            [(block.x, block.y) for block in game.current_shape.blocks])
+
+
+def record(seed, policy, events=600, interval=5):
+    ''' plays random events on a narrow game, so that rows are removed
+        and the game may end, and records them with a checkpoint every
+        interval events
+        Return value: type: tuple - (the ReplayLog, the state of the
+                      game after each number of events, from 0)
+    '''
+    game = Tetris(seed=seed, width=4, height=20, policy=policy)
+    log = ReplayLog(game, interval)
+    rng = Random(seed)
+    states = [game_state(game)]
+    for i in range(0, events):
+        event = rng.choice(EVENTS)
+        game.do_move('Down' if event == 'gravity' else event)
+        log.record(event, 16 * i, game)
+        states.append(game_state(game))
+    return log, states
+
+
+def test_seek_and_run_match_the_live_game():
+    for policy in PieceSource.POLICIES:
+        lines = 0
+        for seed in range(0, 4):
+            log, states = record(seed, policy)
+            replay = Replay(bytes(log.data))
+            assert replay.policy == policy
+            assert len(replay.events) == len(states) - 1
+            assert len(replay.checkpoints) == len(replay.events) // 5
+            for index in range(0, len(states), 7):
+                assert game_state(replay.seek(index)) == states[index], \
+                    "%s seed %d: seek(%d)" % (policy, seed, index)
+            assert game_state(replay.seek(len(replay.events))) == states[-1]
+            assert game_state(replay.run()) == states[-1]
+            lines += states[-1][3]
+        assert lines > 0
+
+
+def test_version_1_header():
+    # version 1 files have no policy byte and are always 'uniform'
+    log, states = record(3, 'uniform', 200)
+    data = bytearray(log.data)
+    data[4] = 1
+    del data[HEADER.size:HEADER.size + POLICY.size]
+
+    old = Replay(bytes(data))
+    new = Replay(bytes(log.data))
+    assert (old.width, old.height, old.seed, old.policy) == (4, 20, 3, 'uniform')
+    assert old.events == new.events and old.times == new.times
+    assert old.checkpoints == new.checkpoints
+    assert game_state(old.seek(123)) == states[123]
+    assert game_state(old.run()) == states[-1]
@@ -0,0 +1,115 @@
+from collections import deque
+from random import Random
+
+from tetris_core import Block, Point, Tetris
+from tetris_search import find_placements
+
+############################################################
+# PLACEMENTS
+############################################################
+
+MOVES = ['Left', 'Right', 'Up', 'Down']
+
+
+def random_game(seed, kind):
+    ''' Parameters: seed - type: int
+                    kind - type: int - index in Tetris.SHAPES
+        Return value: type: Tetris
+
+        returns a game whose bottom rows are random, with holes and
+        overhangs, and whose falling shape is of the kind
+    '''
+    game = Tetris(seed=seed, width=8, height=14)
+    board = game.board
+    rng = Random(seed)
+    blocks = []
+    for y in range(6, board.height):
+        for x in range(0, board.width):
+            if rng.random() < 0.1 * (y - 4):
+                blocks.append(Block(Point(x, y), rng.randrange(0, 7)))
+    board.add_blocks(blocks)
+    board.remove_complete_rows()
+    game.current_shape = Tetris.SHAPES[kind](Point(board.width // 2, 0))
+    return game
+
+
+def locked_cells(game):
+    ''' Parameter: game - type: Tetris
+        Return value: type: list - filled with the squares of each
+                      shape the game locks from now on
+    '''
+    locked = []
+
+    def hook(game, board, pose, cleared):
+        shape = game.create_shape(*pose)
+        locked.append(frozenset((block.x, block.y) for block in shape.blocks))
+    game.lock_hooks.append(hook)
+    return locked
+
+
+def shape_state(game):
+    shape = game.current_shape
+    return (tuple((block.x, block.y) for block in shape.blocks),
+            shape.orientation, shape.rotation_dir)
+
+
+def brute_force(game):
+    ''' Parameter: game - type: Tetris
+        Return value: type: dict - the squares of every shape do_move can
+                      lock -> the fewest keys that lock it there
+
+        breadth first search over do_move itself, from the game's state
+    '''
+    locked = locked_cells(game)
+    start = game.snapshot()
+    seen = set([shape_state(game)])
+    queue = deque([(start, 0)])
+    found = {}
+    while queue:
+        state, keys = queue.popleft()
+        for key in MOVES:
+            game.restore(state)
+            game.do_move(key)
+            if game.pieces != state.pieces:
+                if locked[-1] not in found:
+                    found[locked[-1]] = keys + 1
+                continue
+            new = shape_state(game)
+            if new not in seen:
+                seen.add(new)
+                queue.append((game.snapshot(), keys + 1))
+    game.restore(start)
+    game.lock_hooks.pop()
+    return found
+
+
+def test_placement_keys_lock_on_the_cells():
+    for seed in range(0, 6):
+        for kind in range(0, len(Tetris.SHAPES)):
+            game = random_game(seed, kind)
+            locked = locked_cells(game)
+            start = game.snapshot()
+            placements = find_placements(game.board, game.current_shape)
+            assert placements
+            for placement in placements:
+                game.restore(start)
+                for key in placement.keys[:-1]:
+                    game.do_move(key)
+                    assert game.pieces == start.pieces, \
+                        "seed %d %r locked early" % (seed, placement)
+                game.do_move(placement.keys[-1])
+                assert game.pieces == start.pieces + 1
+                assert locked[-1] == frozenset(placement.cells), \
+                    "seed %d %r" % (seed, placement)
+
+
+def test_placements_match_brute_force():
+    for seed in range(0, 3):
+        for kind in range(0, len(Tetris.SHAPES)):
+            game = random_game(seed, kind)
+            expected = brute_force(game)
+            placements = find_placements(game.board, game.current_shape)
+            assert (dict((frozenset(placement.cells), len(placement.keys))
+                         for placement in placements) == expected), \
+                "seed %d kind %d" % (seed, kind)
+            assert len(placements) == len(expected)
@@ -0,0 +1,204 @@
+import numpy as np
+
+from tetris_core import PieceSource, Point, Tetris
+
+############################################################
+# SHAPE TABLES
+############################################################
+
+def shape_tables(width):
+    ''' Parameter: width - type:int - the width of the board
+        Return value: type: tuple
+
+        builds the arrays the batch engine plays with from the shape
+        classes of tetris_core, so both follow the same rules:
+        offsets - (shapes, 4, 4, 2) offset of each block from blocks[1]
+                  for every orientation (unused orientations repeat)
+        orientations - (shapes,) number of orientations of each shape
+        spawn - (shapes, 2) position of blocks[1] of a new shape
+    '''
+    count = len(Tetris.SHAPES)
+    offsets = np.zeros((count, 4, 4, 2), dtype=np.int64)
+    orientations = np.zeros(count, dtype=np.int64)
+    spawn = np.zeros((count, 2), dtype=np.int64)
+
+    for kind, shape_class in enumerate(Tetris.SHAPES):
+        rotations = shape_class.ROTATIONS
+        orientations[kind] = len(rotations)
+        for orientation in range(0, 4):
+            offsets[kind, orientation] = rotations[orientation % len(rotations)]
+        pivot = shape_class(Point(int(width/2), 0)).blocks[1]
+        spawn[kind] = (pivot.x, pivot.y)
+
+    return offsets, orientations, spawn
+
+
+############################################################
+# BATCH TETRIS CLASS
+############################################################
+
+class BatchTetris():
+    ''' BatchTetris class: plays many independent games at once with
+        the rules of Tetris.do_move, one action per game per step
+
+        Attributes:
+        ACTIONS - type: list - the keys the action codes stand for
+        count - type:int - number of games
+        width, height - type:int - size of every board
+        rows - type:array (count, height) - one bitmask per board row,
+               bit x set if square (x, y) is occupied
+        kind - type:array (count,) - index in Tetris.SHAPES of the
+               current shape
+        x, y - type:array (count,) - the position of blocks[1] of the
+               current shape
+        orientation - type:array (count,) - index in the shape's ROTATIONS
+        lines - type:array (count,) - rows cleared so far
+        pieces - type:array (count,) - shapes locked so far
+        over - type:array (count,) - True once a new shape did not fit;
+               a game that is over ignores its actions
+        policy - type:string - the piece policy of the games, see PieceSource
+        sources - type:list - one PieceSource per game
+
+        Seeding game i with seed s draws the same shapes as Tetris(seed=s)
+        with the same policy, so both give the same boards for the same
+        actions.
+    '''
+
+    ACTIONS = ['Left', 'Right', 'Down', 'Up']
+    LEFT, RIGHT, DOWN, UP = range(0, 4)
+
+    def __init__(self, seeds, width=Tetris.BOARD_WIDTH, height=Tetris.BOARD_HEIGHT,
+                 policy='uniform'):
+        if width > 62:
+            raise ValueError("boards wider than 62 squares do not fit in an int64 row")
+        self.count = len(seeds)
+        self.width = width
+        self.height = height
+        self.policy = policy
+        self.full_row = (1 << width) - 1
+        self.offsets, self.orientations, self.spawn = shape_tables(width)
+        self.reset(seeds)
+
+    def reset(self, seeds):
+        ''' Parameter: seeds - type: list of int - one seed per game
+
+            starts every game again on an empty board
+        '''
+        n = self.count
+        self.rows = np.zeros((n, self.height), dtype=np.int64)
+        self.kind = np.zeros(n, dtype=np.int64)
+        self.x = np.zeros(n, dtype=np.int64)
+        self.y = np.zeros(n, dtype=np.int64)
+        self.orientation = np.zeros(n, dtype=np.int64)
+        self.lines = np.zeros(n, dtype=np.int64)
+        self.pieces = np.zeros(n, dtype=np.int64)
+        self.over = np.zeros(n, dtype=bool)
+        self.sources = [PieceSource(seed, len(Tetris.SHAPES), self.policy)
+                        for seed in seeds]
+        self.spawn_shapes(np.arange(n))
+
+    def spawn_shapes(self, games):
+        ''' Parameter: games - type: array of int
+
+            gives each of the games the next shape of its source at the top of
+            the board, the way Tetris.create_new_shape does
+        '''
+        kinds = np.array([self.sources[i].take() for i in games],
+                         dtype=np.int64)
+        self.kind[games] = kinds
+        self.x[games] = self.spawn[kinds, 0]
+        self.y[games] = self.spawn[kinds, 1]
+        self.orientation[games] = 0
+
+    def cells(self, games, dx=0, dy=0, turn=0):
+        ''' Parameters: games - type: array of int
+                        dx, dy - type: int - offset to apply
+                        turn - type: int - 1 to look at the next orientation
+            Return value: type: tuple of (len(games), 4) arrays
+
+            returns the x and y of the blocks of the current shapes
+        '''
+        kind = self.kind[games]
+        orientation = (self.orientation[games] + turn) % self.orientations[kind]
+        offsets = self.offsets[kind, orientation]
+        xs = self.x[games, None] + dx + offsets[:, :, 0]
+        ys = self.y[games, None] + dy + offsets[:, :, 1]
+        return xs, ys
+
+    def fits(self, games, xs, ys):
+        ''' Parameters: games - type: array of int
+                        xs, ys - type: (len(games), 4) arrays
+            Return value: type: array of bool
+
+            checks, for each game, if all the squares are inside
+            the board and empty
+        '''
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        rows = self.rows[games[:, None], np.clip(ys, 0, self.height - 1)]
+        taken = (rows >> np.clip(xs, 0, self.width - 1)) & 1
+        return np.all(inside & (taken == 0), axis=1)
+
+    def step(self, actions):
+        ''' Parameter: actions - type: array of int - one code of
+                       ACTIONS per game
+            Return value: type: tuple of arrays
+                          (rewards, lines, over)
+
+            applies one action to every game that is not over, like
+            Tetris.do_move. rewards holds the rows each game cleared
+            in this step, lines the rows cleared so far
+        '''
+        actions = np.asarray(actions)
+        rewards = np.zeros(self.count, dtype=np.int64)
+        playing = ~self.over
+
+        for dx, code in ((-1, self.LEFT), (1, self.RIGHT)):
+            games = np.nonzero(playing & (actions == code))[0]
+            xs, ys = self.cells(games, dx=dx)
+            self.x[games[self.fits(games, xs, ys)]] += dx
+
+        games = np.nonzero(playing & (actions == self.UP))[0]
+        xs, ys = self.cells(games, turn=1)
+        games = games[self.fits(games, xs, ys)]
+        self.orientation[games] = ((self.orientation[games] + 1)
+                                   % self.orientations[self.kind[games]])
+
+        games = np.nonzero(playing & (actions == self.DOWN))[0]
+        xs, ys = self.cells(games, dy=1)
+        down_one = self.fits(games, xs, ys)
+        xs, ys = self.cells(games, dy=2)
+        down_two = self.fits(games, xs, ys)
+        self.y[games[down_one]] += 1
+        locked = games[~down_one | ~down_two]
+        if len(locked):
+            rewards[locked] = self.lock(locked)
+
+        return rewards, self.lines, self.over
+
+    def lock(self, games):
+        ''' Parameter: games - type: array of int
+            Return value: type: array of int - the rows each game cleared
+
+            adds the current shapes to their boards, removes the
+            complete rows and spawns new shapes
+        '''
+        xs, ys = self.cells(games)
+        for block in range(0, 4):
+            self.rows[games, ys[:, block]] |= np.left_shift(1, xs[:, block])
+        self.pieces[games] += 1
+
+        rows = self.rows[games]
+        full = rows == self.full_row
+        cleared = full.sum(axis=1)
+        # full rows first, then the rest top to bottom; the full ones
+        # become the empty rows at the top
+        order = np.argsort(~full, axis=1, kind='stable')
+        rows = np.take_along_axis(rows, order, axis=1)
+        rows[np.arange(self.height)[None, :] < cleared[:, None]] = 0
+        self.rows[games] = rows
+        self.lines[games] += cleared
+
+        self.spawn_shapes(games)
+        xs, ys = self.cells(games)
+        self.over[games[~self.fits(games, xs, ys)]] = True
+        return cleared
@@ -0,0 +1,329 @@
+import argparse
+import json
+import platform
+import sys
+from random import Random
+from time import perf_counter
+
+from tetris_core import Block, Point, Tetris
+from tetris_search import find_placements
+
+############################################################
+# BOARDS
+############################################################
+
+FILL_LEVELS = [0, 25, 50, 75]
+
+
+def filled_game(engine, fill, seed=0, width=None, height=None):
+    ''' Parameters: engine - type: string - the board engine
+                    fill - type: int - the percentage of rows filled
+                    seed - type: int
+                    width, height - type: int - the size of the board,
+                    Tetris.BOARD_WIDTH and BOARD_HEIGHT unless given
+        Return value: type: Tetris
+
+        returns a game whose bottom fill% rows are random, about 70%
+        full and never complete, the current shape at the top
+    '''
+    game = Tetris(engine, seed, width, height)
+    board = game.board
+    rng = Random(seed)
+    blocks = []
+    for y in range(board.height - board.height * fill // 100, board.height):
+        hole = rng.randrange(0, board.width)
+        for x in range(0, board.width):
+            if x != hole and rng.random() < 0.7:
+                blocks.append(Block(Point(x, y), rng.randrange(0, 7)))
+    board.add_blocks(blocks)
+    return game
+
+
+def clear_game(engine, rows=4, seed=0, width=None, height=None):
+    ''' Parameters: engine - type: string
+                    rows - type: int - the complete rows
+                    width, height - type: int - the size of the board
+        Return value: type: Tetris
+
+        returns a game with rows complete rows at the bottom, each under
+        a random row, and half the board filled above them: the most
+        blocks a clear can move
+    '''
+    game = filled_game(engine, 50, seed, width, height)
+    board = game.board
+    blocks = []
+    for i in range(0, rows):
+        y = board.height - 1 - 2*i
+        for x in range(0, board.width):
+            if board.can_move(x, y):
+                blocks.append(Block(Point(x, y), 0))
+    board.add_blocks(blocks)
+    return game
+
+
+############################################################
+# BENCHMARKS
+############################################################
+#
+# A benchmark is a function (engine, fill, number) that plays number
+# operations and returns how long they took, in seconds, and how many
+# operations it counted.
+
+def bench_can_move(engine, fill, number):
+    ''' Shape.can_move (Board.shape_fits) for every shape and direction,
+        with the shapes resting just above the stack
+    '''
+    game = filled_game(engine, fill)
+    board = game.board
+    y = max(1, board.height - board.height * fill // 100 - 2)
+    shapes = [shape_class(Point(board.width // 2, y)) for shape_class in Tetris.SHAPES]
+    moves = [(-1, 0), (1, 0), (0, 1)]
+    start = perf_counter()
+    for i in range(0, number):
+        shapes[i % 7].can_move(board, *moves[i % 3])
+    return perf_counter() - start, number
+
+
+def bench_can_move_blocks(engine, fill, number):
+    ''' the same moves as bench_can_move, checked the way the game did
+        before Board.shape_fits: Block.can_move (Board.can_move) for
+        each block. can_move should not be slower than this
+    '''
+    game = filled_game(engine, fill)
+    board = game.board
+    y = max(1, board.height - board.height * fill // 100 - 2)
+    shapes = [shape_class(Point(board.width // 2, y)) for shape_class in Tetris.SHAPES]
+    moves = [(-1, 0), (1, 0), (0, 1)]
+    start = perf_counter()
+    for i in range(0, number):
+        dx, dy = moves[i % 3]
+        for block in shapes[i % 7].blocks:
+            if not block.can_move(board, dx, dy):
+                break
+    return perf_counter() - start, number
+
+
+def bench_rotate_positions(engine, fill, number):
+    ''' Shape.get_rotate_positions, without its cache
+    '''
+    game = filled_game(engine, fill)
+    shapes = [shape_class(Point(game.board.width // 2, 1))
+              for shape_class in Tetris.SHAPES]
+    start = perf_counter()
+    for i in range(0, number):
+        shape = shapes[i % 7]
+        shape.rotate_cache = None
+        shape.get_rotate_positions(game.board)
+    return perf_counter() - start, number
+
+
+def bench_remove_rows(engine, fill, number):
+    ''' Board.remove_complete_rows over every row of a board with no
+        complete row
+    '''
+    board = filled_game(engine, fill).board
+    start = perf_counter()
+    for i in range(0, number):
+        board.remove_complete_rows()
+    return perf_counter() - start, number
+
+
+def bench_clear4(engine, fill, number):
+    ''' Board.remove_complete_rows with four complete rows under a half
+        full board; the board is restored between the clears, untimed
+    '''
+    game = clear_game(engine)
+    board = game.board
+    state = board.snapshot()
+    rows = list(range(0, board.height))
+    elapsed = 0.0
+    for i in range(0, number):
+        board.restore(state)
+        start = perf_counter()
+        board.remove_complete_rows(rows)
+        elapsed += perf_counter() - start
+    return elapsed, number
+
+
+def bench_clear_large(engine, fill, number):
+    ''' Board.remove_complete_rows with one complete row at the bottom
+        of a 400x4000 board, 2000 rows of blocks above it: the cost of
+        a clear that moves every row of a huge board
+    '''
+    game = clear_game(engine, 1, 0, 400, 4000)
+    board = game.board
+    state = board.snapshot()
+    rows = [board.height - 1]
+    elapsed = 0.0
+    for i in range(0, number):
+        board.restore(state)
+        start = perf_counter()
+        board.remove_complete_rows(rows)
+        elapsed += perf_counter() - start
+    return elapsed, number
+
+
+def bench_do_move(engine, fill, number):
+    ''' Tetris.do_move with random keys; the game is restored when the
+        stack reaches the top
+    '''
+    game = filled_game(engine, fill)
+    state = game.snapshot()
+    rng = Random(1)
+    keys = [rng.choice(['Left', 'Right', 'Down', 'Down', 'Up', 'space'])
+            for i in range(0, 4096)]
+    elapsed = 0.0
+    start = perf_counter()
+    for i in range(0, number):
+        game.do_move(keys[i & 4095])
+        if game.board.over:
+            elapsed += perf_counter() - start
+            game.restore(state)
+            start = perf_counter()
+    return elapsed + perf_counter() - start, number
+
+
+def bench_game_ticks(engine, fill, number):
+    ''' whole games played with random keys; counts do_move calls
+    '''
+    rng = Random(2)
+    keys = ['Left', 'Right', 'Down', 'Down', 'Down', 'Up']
+    ticks = 0
+    seed = 0
+    start = perf_counter()
+    while ticks < number:
+        game = Tetris(engine, seed)
+        while not game.board.over and ticks < number:
+            game.do_move(rng.choice(keys))
+            ticks += 1
+        seed += 1
+    return perf_counter() - start, ticks
+
+
+def bench_game_pieces(engine, fill, number):
+    ''' whole games where each shape goes to its lowest placement from
+        find_placements; counts shapes
+    '''
+    pieces = 0
+    seed = 0
+    start = perf_counter()
+    while pieces < number:
+        game = Tetris(engine, seed)
+        while not game.board.over and pieces < number:
+            placements = find_placements(game.board, game.current_shape)
+            best = max(placements, key=lambda p: min(y for x, y in p.cells))
+            for key in best.keys:
+                game.do_move(key)
+            pieces += 1
+        seed += 1
+    return perf_counter() - start, pieces
+
+
+### name, function, operations per round, whether it depends on the fill level
+BENCHMARKS = [
+    ('can_move', bench_can_move, 20000, True),
+    ('can_move_blocks', bench_can_move_blocks, 20000, True),
+    ('rotate_positions', bench_rotate_positions, 20000, False),
+    ('remove_complete_rows', bench_remove_rows, 2000, True),
+    ('clear4', bench_clear4, 2000, False),
+    ('clear_large', bench_clear_large, 20, False),
+    ('do_move', bench_do_move, 10000, True),
+    ('game_ticks', bench_game_ticks, 10000, False),
+    ('game_pieces', bench_game_pieces, 200, False),
+]
+
+
+############################################################
+# RUNNER
+############################################################
+
+def run_benchmarks(engines=('bitboard', 'dict'), repeat=5, scale=1.0, only=None):
+    ''' Parameters: engines - type: list of string
+                    repeat - type: int - rounds per benchmark; the fastest
+                    counts
+                    scale - type: float - multiplies the operations per round
+                    only - type: string - runs the benchmarks whose name
+                    contains it
+        Return value: type: dict - benchmark name -> {'ns_per_op',
+                      'ops_per_sec', 'ops'}
+    '''
+    results = {}
+    for name, function, number, by_fill in BENCHMARKS:
+        for engine in engines:
+            for fill in (FILL_LEVELS if by_fill else [None]):
+                full_name = '%s/%s' % (name, engine)
+                if fill is not None:
+                    full_name += '/fill%d' % fill
+                if only and only not in full_name:
+                    continue
+                best = None
+                for i in range(0, repeat):
+                    elapsed, ops = function(engine, fill or 0, max(1, int(number * scale)))
+                    if best is None or elapsed / ops < best:
+                        best = elapsed / ops
+                results[full_name] = {'ns_per_op': best * 1e9,
+                                      'ops_per_sec': 1.0 / best,
+                                      'ops': ops}
+    return results
+
+
+def compare(results, baseline, threshold=0.10):
+    ''' Parameters: results, baseline - type: dict - from run_benchmarks
+                    threshold - type: float - the slowdown that counts as
+                    a regression, 0.10 for 10%
+        Return value: type: list of (name, baseline ns, ns, change,
+                      regression) - one per benchmark in both; regression
+                      is True when change > threshold
+    '''
+    changes = []
+    for name in sorted(results):
+        if name in baseline:
+            old = baseline[name]['ns_per_op']
+            new = results[name]['ns_per_op']
+            change = new / old - 1.0
+            changes.append((name, old, new, change, change > threshold))
+    return changes
+
+
+################################################################
+# Run the benchmarks
+################################################################
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="benchmark the Tetris game core")
+    parser.add_argument('--json', help="write the results to this file")
+    parser.add_argument('--compare', help="a --json file to compare with")
+    parser.add_argument('--threshold', type=float, default=0.10)
+    parser.add_argument('--engine', action='append', choices=['bitboard', 'dict'])
+    parser.add_argument('--filter', help="only the benchmarks whose name contains this")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--quick', action='store_true', help="a tenth of the operations")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.engine or ['bitboard', 'dict'], args.repeat,
+                             0.1 if args.quick else 1.0, args.filter)
+    for name in sorted(results):
+        print("%-36s %12.1f ns/op %14.1f ops/s"
+              % (name, results[name]['ns_per_op'], results[name]['ops_per_sec']))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': platform.python_version(),
+                       'machine': platform.machine(),
+                       'results': results}, f, indent=1, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = 0
+        print("")
+        for name, old, new, change, regression in compare(results, baseline,
+                                                          args.threshold):
+            flag = ''
+            if regression:
+                flag = 'REGRESSION'
+                regressions += 1
+            print("%-36s %12.1f -> %12.1f ns/op %+7.1f%% %s"
+                  % (name, old, new, change * 100, flag))
+        if regressions:
+            sys.exit(1)
@@ -0,0 +1,255 @@
+import struct
+
+from tetris_core import Point, Tetris
+from tetris_replay import CHECKPOINT_HEADER, encode_checkpoint
+
+############################################################
+# FRAMES
+############################################################
+#
+# A frame is a uint32 length and that many bytes: the frame type (uint8)
+# and the tick (uint32), then
+#
+#   KEYFRAME: board width and height (uint16) and a replay checkpoint of the
+#             game (see tetris_replay.encode_checkpoint), one byte per
+#             square, so the length of a frame is a uint32
+#   DELTA:    operations, each a code (uint8) and its data:
+#             LOCK  kind, x, y, orientation of the shape added to the board
+#                   (uint8, int16, int16, uint8)
+#             CLEAR the number of rows removed (uint8), then each row (uint16)
+#             POSE  kind, x, y, orientation of the falling shape
+#             OVER  no data, the game is over
+#
+# all little endian. A spectator ignores deltas until its first keyframe.
+
+KEYFRAME, DELTA = 0, 1
+LOCK, CLEAR, POSE, OVER = 1, 2, 3, 4
+
+LENGTH = struct.Struct('<I')
+FRAME_HEADER = struct.Struct('<BI')
+SIZE = struct.Struct('<HH')
+SHAPE_POSE = struct.Struct('<BhhB')
+ROW = struct.Struct('<H')
+
+### the color index of each kind of shape
+SHAPE_COLORS = [shape_class(Point(0, 0)).blocks[0].color
+                for shape_class in Tetris.SHAPES]
+
+
+def shape_pose(shape):
+    ''' Parameter: shape - type: Shape
+        Return value: type: tuple - (kind, x, y, orientation)
+    '''
+    pivot = shape.blocks[1]
+    return (Tetris.SHAPES.index(type(shape)), pivot.x, pivot.y, shape.orientation)
+
+
+############################################################
+# BROADCASTER CLASS
+############################################################
+
+class Broadcaster():
+    ''' Broadcaster class: sends what happens in a game to its
+        subscribers as frames, each encoded once for all of them
+        Attributes: game - type: Tetris
+                    subscribers - type: list - objects with a write(bytes)
+                    method, e.g. asyncio.StreamWriter
+                    interval - type: int - a keyframe follows every
+                    interval deltas
+                    tick - type: int - the frames published so far
+                    keyframe - type: bytes - the last keyframe
+                    backlog - type: list - the deltas since the last keyframe
+                    ops - type: bytearray - the operations of the next delta
+                    pose - type: tuple - the pose of the falling shape
+                    the subscribers were last sent
+                    over - type: bool - whether they were told the game is over
+                    bytes_sent - type: int - the bytes written to subscribers
+    '''
+
+    def __init__(self, game, interval=64):
+        if max(game.board.width, game.board.height) > 0x7fff:
+            raise ValueError("the positions of a %dx%d board do not fit in an int16"
+                             % (game.board.width, game.board.height))
+        self.game = game
+        self.subscribers = []
+        self.interval = interval
+        self.tick = 0
+        self.ops = bytearray()
+        self.pose = shape_pose(game.current_shape)
+        self.over = game.board.over
+        self.bytes_sent = 0
+        self.keyframe = self.encode_keyframe()
+        self.backlog = []
+        game.lock_hooks.append(self.on_lock)
+
+    def on_lock(self, game, board, pose, cleared):
+        ''' the lock hook of the game, see Tetris.lock_hooks
+        '''
+        self.ops.append(LOCK)
+        self.ops += SHAPE_POSE.pack(*pose)
+        if cleared:
+            self.ops.append(CLEAR)
+            self.ops.append(len(cleared))
+            for y in cleared:
+                self.ops += ROW.pack(y)
+        # the new shape may have the pose of the old one
+        self.pose = None
+
+    def frame(self, kind, body):
+        payload = FRAME_HEADER.pack(kind, self.tick) + body
+        self.tick += 1
+        return LENGTH.pack(len(payload)) + payload
+
+    def encode_keyframe(self):
+        board = self.game.board
+        return self.frame(KEYFRAME, SIZE.pack(board.width, board.height)
+                          + encode_checkpoint(self.game, self.tick))
+
+    def subscribe(self, subscriber):
+        ''' Parameter: subscriber - an object with a write(bytes) method
+
+            sends the subscriber the last keyframe and the deltas since,
+            then every frame that follows
+        '''
+        subscriber.write(self.keyframe)
+        for frame in self.backlog:
+            subscriber.write(frame)
+        self.bytes_sent += len(self.keyframe) + sum(len(frame) for frame in self.backlog)
+        self.subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber):
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+
+    def send(self, frame):
+        for subscriber in self.subscribers:
+            subscriber.write(frame)
+        self.bytes_sent += len(frame) * len(self.subscribers)
+
+    def publish(self):
+        ''' Return value: type: bytes - the delta sent, None if nothing
+                          changed
+
+            sends the changes since the last publish: the shapes locked
+            and rows removed (from the lock hook), the falling shape if
+            it moved, turned or is new, and the end of the game. Call
+            it after the moves of a tick
+        '''
+        pose = shape_pose(self.game.current_shape)
+        if pose != self.pose:
+            self.ops.append(POSE)
+            self.ops += SHAPE_POSE.pack(*pose)
+            self.pose = pose
+        if self.game.board.over and not self.over:
+            self.ops.append(OVER)
+            self.over = True
+        if not self.ops:
+            return None
+
+        delta = self.frame(DELTA, bytes(self.ops))
+        self.ops = bytearray()
+        self.send(delta)
+        self.backlog.append(delta)
+
+        if len(self.backlog) >= self.interval:
+            self.keyframe = self.encode_keyframe()
+            self.backlog = []
+            self.send(self.keyframe)
+        return delta
+
+
+############################################################
+# SPECTATOR CLASS
+############################################################
+
+class Spectator():
+    ''' Spectator class: rebuilds a game from the frames of a Broadcaster
+        Attributes: width, height - type: int - size of the board
+                    cells - type: bytearray - one byte per square, row by
+                    row: 0 if empty, color index + 1 otherwise
+                    pose - type: tuple - kind, x, y, orientation of the
+                    falling shape
+                    pieces, lines - type: int
+                    over - type: bool
+                    tick - type: int - the tick of the last frame applied
+                    synced - type: bool - True once a keyframe was applied
+    '''
+
+    def __init__(self):
+        self.width = 0
+        self.height = 0
+        self.cells = bytearray()
+        self.pose = None
+        self.pieces = 0
+        self.lines = 0
+        self.over = False
+        self.tick = -1
+        self.synced = False
+
+    def apply(self, payload):
+        ''' Parameter: payload - type: bytes - a frame without its length
+        '''
+        kind, tick = FRAME_HEADER.unpack_from(payload)
+        pos = FRAME_HEADER.size
+        if kind == KEYFRAME:
+            self.width, self.height = SIZE.unpack_from(payload, pos)
+            pos += SIZE.size
+            (events, self.pieces, self.lines, over, shape,
+             x, y, orientation) = CHECKPOINT_HEADER.unpack_from(payload, pos)
+            self.over = bool(over)
+            self.pose = (shape, x, y, orientation)
+            self.cells = bytearray(payload[pos + CHECKPOINT_HEADER.size:])
+            self.synced = True
+        elif self.synced and tick > self.tick:
+            self.apply_ops(payload, pos)
+        else:
+            return
+        self.tick = tick
+
+    def apply_ops(self, payload, pos):
+        while pos < len(payload):
+            op = payload[pos]
+            pos += 1
+            if op == LOCK:
+                kind, x, y, orientation = SHAPE_POSE.unpack_from(payload, pos)
+                pos += SHAPE_POSE.size
+                for dx, dy in Tetris.SHAPES[kind].ROTATIONS[orientation]:
+                    self.cells[(y + dy)*self.width + x + dx] = SHAPE_COLORS[kind] + 1
+                self.pieces += 1
+            elif op == CLEAR:
+                count = payload[pos]
+                pos += 1
+                rows = [ROW.unpack_from(payload, pos + 2*i)[0] for i in range(0, count)]
+                pos += 2*count
+                self.remove_rows(rows)
+                self.lines += count
+            elif op == POSE:
+                self.pose = SHAPE_POSE.unpack_from(payload, pos)
+                pos += SHAPE_POSE.size
+            elif op == OVER:
+                self.over = True
+            else:
+                raise ValueError("unknown frame operation %d" % op)
+
+    def remove_rows(self, rows):
+        width = self.width
+        gone = set(rows)
+        kept = [self.cells[y*width:(y + 1)*width]
+                for y in range(0, self.height) if y not in gone]
+        self.cells = bytearray(width * len(rows)) + b''.join(kept)
+
+
+def read_frames(data):
+    ''' Parameter: data - type: bytes - frames one after the other
+        Return value: type: tuple - (list of payloads, the bytes left over
+                      from an incomplete frame)
+    '''
+    payloads = []
+    pos = 0
+    while pos + LENGTH.size <= len(data):
+        size = LENGTH.unpack_from(data, pos)[0]
+        if pos + LENGTH.size + size > len(data):
+            break
+        payloads.append(data[pos + LENGTH.size:pos + LENGTH.size + size])
+        pos += LENGTH.size + size
+    return payloads, data[pos:]
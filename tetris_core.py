@@ -0,0 +1,1570 @@
+from bisect import bisect_right
+from random import Random, randrange
+
+### the fill colors of the blocks; blocks only store an index into this list
+COLORS = ['blue', 'orange', 'cyan', 'red', 'green', 'yellow', 'magenta']
+
+############################################################
+# POINT CLASS
+############################################################
+
+class Point():
+    ''' Point class: a square of the board
+        Attributes: x - type: int
+                    y - type: int
+    '''
+
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def getX(self):
+        return self.x
+
+    def getY(self):
+        return self.y
+
+############################################################
+# BLOCK CLASS
+############################################################
+
+class Block():
+    ''' Block class:
+        Implement a block for a tetris piece
+        Attributes: x - type: int
+                    y - type: int
+        specify the position on the tetris board
+        in terms of the square grid
+                    color - type: int - the index of the block's fill
+                    color in COLORS
+
+        Blocks are only the model of a square: the views keep their
+        own canvas items, so a block is just three slots.
+    '''
+
+    __slots__ = ('x', 'y', 'color')
+
+    def __init__(self, pos, color):
+        self.x = pos.x
+        self.y = pos.y
+        self.color = color
+
+    def can_move(self, board, dx, dy):
+        ''' Parameters: dx - type: int
+                        dy - type: int
+
+            Return value: type: bool
+                        
+            checks if the block can move dx squares in the x direction
+            and dy squares in the y direction
+            Returns True if it can, and False otherwise
+            HINT: use the can_move method on the Board object
+        '''
+
+        DIRECTION_DOWN = dx == 0 and dy == 1
+
+        OUT_OF_BOUNDS = (self.x + dx) > board.width or (self.x + dx) < 0 or (self.y + dy) > board.height - 1 or (self.y + dy) < 0
+        if OUT_OF_BOUNDS or not board.can_move(self.x + dx, self.y + dy):
+            return False
+        else:
+            return True
+    
+    def move(self, dx, dy):
+        ''' Parameters: dx - type: int
+                        dy - type: int
+                        
+            moves the block dx squares in the x direction
+            and dy squares in the y direction
+        '''
+
+        self.x += dx
+        self.y += dy
+
+############################################################
+# SHAPE CLASS
+############################################################
+
+class Shape():
+    ''' Shape class:
+        Base class for all the tetris shapes
+        Attributes: blocks - type: list - the list of blocks making up the shape
+                    rotation_dir - type: int - the current rotation direction of the shape
+                    shift_rotation_dir - type: Boolean - whether or not the shape rotates
+                    orientation - type: int - index of the current entry in ROTATIONS
+
+        ROTATIONS - type: list - one entry per orientation, in rotation order;
+        each entry holds the (dx, dy) offset of every block from blocks[1],
+        the block the shape rotates around
+    '''
+
+    ROTATIONS = [((0, 0), (0, 0), (0, 0), (0, 0))]
+
+    __slots__ = ('blocks', 'rotation_dir', 'orientation', 'rotate_cache',
+                 'shift_rotation_dir', 'center_block')
+
+    def __init__(self, coords, color):
+        color = COLORS.index(color)
+        self.blocks = []
+        self.rotation_dir = 1
+        self.orientation = 0
+        ### (pivot x, pivot y, orientation) and the positions computed for it,
+        ### so can_rotate and rotate share one lookup
+        self.rotate_cache = None
+        ### A boolean to indicate if a shape shifts rotation direction or not.
+        ### Defaults to false since only 3 shapes shift rotation directions (I, S and Z)
+        self.shift_rotation_dir = False
+        
+        for pos in coords:
+            self.blocks.append(Block(pos, color))
+
+
+
+    def get_blocks(self):
+        '''returns the list of blocks
+        '''
+        #YOUR CODE HERE
+        return self.blocks
+
+    def move(self, dx, dy):
+        ''' Parameters: dx - type: int
+                        dy - type: int
+
+            moves the shape dx squares in the x direction
+            and dy squares in the y direction, i.e.
+            moves each of the blocks
+        '''
+        for block in self.blocks:
+            block.move(dx, dy)
+
+    def can_move(self, board, dx, dy):
+        ''' Parameters: dx - type: int
+                        dy - type: int
+
+            Return value: type: bool
+                        
+            checks if the shape can move dx squares in the x direction
+            and dy squares in the y direction, i.e.
+            check if each of the blocks can move
+            Returns True if all of them can, and False otherwise
+           
+        '''
+        
+        #YOUR CODE HERE
+        return board.shape_fits(self, dx, dy)
+    
+    def get_rotation_dir(self):
+        ''' Return value: type: int
+        
+            returns the current rotation direction
+        '''
+        return self.rotation_dir
+
+    def get_rotate_positions(self, board):
+        ''' Parameters: board - type: Board object
+            Return value: type: list of (x, y) tuples
+
+            returns the position of each block after the next rotation,
+            looked up in ROTATIONS around blocks[1]
+        '''
+        pivot = self.blocks[1]
+        key = (pivot.x, pivot.y, self.orientation)
+        if self.rotate_cache is None or self.rotate_cache[0] != key:
+            offsets = self.ROTATIONS[(self.orientation + 1) % len(self.ROTATIONS)]
+            positions = [(pivot.x + dx, pivot.y + dy) for dx, dy in offsets]
+            self.rotate_cache = (key, positions)
+        return self.rotate_cache[1]
+
+    def can_rotate(self, board):
+        ''' Parameters: board - type: Board object
+            Return value: type : bool
+            
+            Checks if the shape can be rotated.
+            
+            1. Get the position of each block after rotation
+            2. If any of the positions is outside the board or occupied,
+            return False
+                        
+            otherwise all is good, return True
+        '''
+        
+        new_blocks = self.get_rotate_positions(board)
+        if board.can_place(new_blocks):
+            return True
+
+        # a position may still be taken by a block of this same shape,
+        # which only happens once the shape overlaps the board (game over)
+        own = set((block.x, block.y) for block in self.blocks)
+        for x, y in new_blocks:
+            if not board.can_move(x, y) and (x, y) not in own:
+                return False
+        return True
+
+    def rotate(self, board):
+        ''' Parameters: board - type: Board object
+
+            rotates the shape:
+            1. Get the position of each block after rotation
+            2. Move the block to the new position
+            3. Advance to the next orientation
+            
+        '''    
+
+        rotated_blocks = self.get_rotate_positions(board)
+
+        for block, (xnew, ynew) in zip(self.blocks, rotated_blocks):
+            block.move(xnew - block.x, ynew - block.y)
+
+        self.orientation = (self.orientation + 1) % len(self.ROTATIONS)
+
+        ### This should be at the END of your rotate code. 
+        ### DO NOT touch it. Default behavior is that a piece will only shift
+        ### rotation direciton after a successful rotation. This ensures that 
+        ### pieces which switch rotations definitely remain within their 
+        ### accepted rotation positions.
+        if self.shift_rotation_dir:
+            self.rotation_dir *= -1
+
+        
+
+############################################################
+# ALL SHAPE CLASSES
+############################################################
+
+ 
+class I_shape(Shape):
+    ROTATIONS = [((-1, 0), (0, 0), (1, 0), (2, 0)),
+                 ((0, -1), (0, 0), (0, 1), (0, 2)),
+                 ((1, 0), (0, 0), (-1, 0), (-2, 0)),
+                 ((0, 1), (0, 0), (0, -1), (0, -2))]
+    __slots__ = ()
+
+    def __init__(self, center):
+        coords = [Point(center.x - 2, center.y),
+                  Point(center.x - 1, center.y),
+                  Point(center.x    , center.y),
+                  Point(center.x + 1, center.y)]
+        Shape.__init__(self, coords, 'blue')
+        self.shift_rotation_dir = True
+        self.center_block = self.blocks[2]
+
+
+class J_shape(Shape):
+    ROTATIONS = [((-1, 0), (0, 0), (1, 0), (1, 1)),
+                 ((0, -1), (0, 0), (0, 1), (-1, 1)),
+                 ((1, 0), (0, 0), (-1, 0), (-1, -1)),
+                 ((0, 1), (0, 0), (0, -1), (1, -1))]
+    __slots__ = ()
+
+    def __init__(self, center):
+        coords = [Point(center.x - 1, center.y),
+                  Point(center.x    , center.y),
+                  Point(center.x + 1, center.y),
+                  Point(center.x + 1, center.y + 1)]
+        Shape.__init__(self, coords, 'orange')        
+        self.center_block = self.blocks[1]
+
+class L_shape(Shape):
+    ROTATIONS = [((-1, 0), (0, 0), (1, 0), (-1, 1)),
+                 ((0, -1), (0, 0), (0, 1), (-1, -1)),
+                 ((1, 0), (0, 0), (-1, 0), (1, -1)),
+                 ((0, 1), (0, 0), (0, -1), (1, 1))]
+    __slots__ = ()
+
+    def __init__(self, center):
+        coords = [Point(center.x - 1, center.y),
+                  Point(center.x    , center.y),
+                  Point(center.x + 1, center.y),
+                  Point(center.x - 1, center.y + 1)]
+        Shape.__init__(self, coords, 'cyan')        
+        self.center_block = self.blocks[1]
+
+
+class O_shape(Shape):
+    ROTATIONS = [((1, 0), (0, 0), (1, 1), (0, 1))]
+    __slots__ = ()
+
+    def __init__(self, center):
+        coords = [Point(center.x    , center.y),
+                  Point(center.x - 1, center.y),
+                  Point(center.x   , center.y + 1),
+                  Point(center.x - 1, center.y + 1)]
+        Shape.__init__(self, coords, 'red')
+        self.center_block = self.blocks[0]
+
+    def rotate(self, board):
+        # Override Shape's rotate method since O_Shape does not rotate
+        return 
+
+class S_shape(Shape):
+    ROTATIONS = [((0, -1), (0, 0), (1, -1), (-1, 0)),
+                 ((-1, 0), (0, 0), (-1, -1), (0, 1))]
+    __slots__ = ()
+
+    def __init__(self, center):
+        coords = [Point(center.x    , center.y),
+                  Point(center.x    , center.y + 1),
+                  Point(center.x + 1, center.y),
+                  Point(center.x - 1, center.y + 1)]
+        Shape.__init__(self, coords, 'green')
+        self.center_block = self.blocks[0]
+        self.shift_rotation_dir = True
+        self.rotation_dir = -1
+
+
+class T_shape(Shape):
+    ROTATIONS = [((-1, 0), (0, 0), (1, 0), (0, 1)),
+                 ((0, -1), (0, 0), (0, 1), (-1, 0)),
+                 ((1, 0), (0, 0), (-1, 0), (0, -1)),
+                 ((0, 1), (0, 0), (0, -1), (1, 0))]
+    __slots__ = ()
+
+    def __init__(self, center):
+        coords = [Point(center.x - 1, center.y),
+                  Point(center.x    , center.y),
+                  Point(center.x + 1, center.y),
+                  Point(center.x    , center.y + 1)]
+        Shape.__init__(self, coords, 'yellow')
+        self.center_block = self.blocks[1]
+
+
+class Z_shape(Shape):
+    ROTATIONS = [((-1, 0), (0, 0), (0, 1), (1, 1)),
+                 ((0, 1), (0, 0), (1, 0), (1, -1))]
+    __slots__ = ()
+
+    def __init__(self, center):
+        coords = [Point(center.x - 1, center.y),
+                  Point(center.x    , center.y), 
+                  Point(center.x    , center.y + 1),
+                  Point(center.x + 1, center.y + 1)]
+        Shape.__init__(self, coords, 'magenta')
+        self.center_block = self.blocks[1]
+        self.shift_rotation_dir = True
+        self.rotation_dir = -1      
+
+
+
+############################################################
+# ZOBRIST KEYS CLASS
+############################################################
+
+### the mask of a 64 bit key
+MASK64 = (1 << 64) - 1
+
+
+def mix64(z):
+    ''' Parameter: z - type: int
+        Return value: type: int
+
+        returns the splitmix64 mix of the low 64 bits of z
+    '''
+    z &= MASK64
+    z = ((z ^ (z >> 30)) * 0xbf58476d1ce4e5b9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94d049bb133111eb) & MASK64
+    return z ^ (z >> 31)
+
+
+class ZobristKeys(dict):
+    ''' ZobristKeys class: random 64 bit keys for hashing board states,
+        the same in every run; keys[i] is the key number i
+        Attributes: salt - type:int - tells the tables apart
+
+        A key is made the first time it is looked up (splitmix64 of i
+        and the salt), so a huge board only costs the keys it uses.
+    '''
+
+    def __init__(self, salt):
+        dict.__init__(self)
+        self.salt = salt
+
+    def __missing__(self, index):
+        key = mix64(index * 0x9e3779b97f4a7c15 + self.salt)
+        self[index] = key
+        return key
+
+### one key per row index for the rows of blocks, one per shape kind and
+### orientation (kind*4 + orientation) and one per square for blocks[1]
+ROW_KEYS = ZobristKeys(0x5eed)
+PIECE_KEYS = ZobristKeys(0x9ece)
+PIVOT_KEYS = ZobristKeys(0x1207)
+
+
+def row_hash(y, row):
+    ''' Parameters: y - type: int - the row index
+                    row - type: int - the bitmask of the occupied squares
+        Return value: type: int
+
+        returns the key of row y holding the squares of row, 0 if the
+        row is empty. The hash of a board is the xor of the keys of
+        its rows, so moving a row down costs two keys, not two per block
+    '''
+    if not row:
+        return 0
+    return mix64(hash(row) * 0x9e3779b97f4a7c15 ^ ROW_KEYS[y])
+
+
+def hash_rows(rows):
+    ''' Parameter: rows - type: list of int - one bitmask per row
+        Return value: type: int
+
+        returns the Zobrist hash of the occupied squares: the xor of
+        the row_hash of every row
+    '''
+    hash = 0
+    for y, row in enumerate(rows):
+        if row:
+            hash ^= row_hash(y, row)
+    return hash
+
+############################################################
+# BITBOARD CLASS
+############################################################
+
+class BitBoard():
+    ''' BitBoard class: stores which squares of the board are occupied,
+        one integer bitmask per row (bit x of rows[y] is set if
+        square (x, y) is occupied)
+
+        Attributes: width - type:int - width of the board in squares
+                    height - type:int - height of the board in squares
+                    rows - type:list - the bitmask of each row, top row first
+                    full_row - type:int - the bitmask of a complete row
+    '''
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.full_row = (1 << width) - 1
+        self.rows = [0] * height
+
+    def can_move(self, x, y):
+        ''' Parameters: x - type:int
+                        y - type:int
+            Return value: type: bool
+
+            returns True if square x,y is inside the board and empty
+        '''
+        if x < 0 or x >= self.width or y < 0 or y >= self.height:
+            return False
+        return not (self.rows[y] >> x) & 1
+
+    def can_place(self, cells):
+        ''' Parameters: cells - type: list of (x, y) tuples
+            Return value: type: bool
+
+            returns True if every square in cells is inside the board
+            and empty. The cells of a row that follow each other are
+            gathered into one mask, tested with a single AND
+        '''
+        for x, y in cells:
+            if x < 0 or x >= self.width or y < 0 or y >= self.height:
+                return False
+        return self.is_free(cells)
+
+    def is_free(self, cells):
+        ''' Parameters: cells - type: list of (x, y) tuples, all inside
+                        the board
+            Return value: type: bool
+
+            returns True if every square in cells is empty
+        '''
+        rows = self.rows
+        row = 0
+        mask = 0
+        for x, y in cells:
+            if y != row:
+                if rows[row] & mask:
+                    return False
+                row = y
+                mask = 0
+            mask |= 1 << x
+        return not rows[row] & mask
+
+    def add(self, cells):
+        ''' Parameters: cells - type: list of (x, y) tuples
+
+            marks every square in cells as occupied
+        '''
+        for x, y in cells:
+            self.rows[y] |= 1 << x
+
+    def is_row_complete(self, y):
+        return self.rows[y] == self.full_row
+
+    def delete_row(self, y):
+        self.rows[y] = 0
+
+    def move_down_rows(self, y_start):
+        ''' Parameters: y_start - type:int
+
+            moves rows y_start down to 1 one square down,
+            the same rows Board.move_down_rows moves
+        '''
+        for y in range(y_start, 0, -1):
+            self.rows[y + 1] |= self.rows[y]
+            self.rows[y] = 0
+
+    def remove_rows(self, cleared, top):
+        ''' Parameters: cleared - type: list of int - top row first
+                        top - type: int - no row above it holds a block
+
+            removes the rows in cleared and moves the rows from top
+            down, filling the top with empty rows
+        '''
+        rows = self.rows
+        shift = 0
+        for y in range(cleared[-1], top - 1, -1):
+            if shift < len(cleared) and y == cleared[-1 - shift]:
+                shift += 1
+                continue
+            rows[y + shift] = rows[y]
+        for y in range(top, top + len(cleared)):
+            rows[y] = 0
+
+
+############################################################
+# BOARD CLASS
+############################################################
+
+class Board():
+    ''' Board class: it represents the Tetris board
+
+        Attributes: width - type:int - width of the board in squares
+                    height - type:int - height of the board in squares
+                    grid - type:Dictionary - keeps track of the current state of
+                    the board; stores the blocks for a given position.
+                    None on a headless bitboard board (see below)
+                    bits - type:BitBoard - the bitboard engine, or None when
+                    the board uses the dictionary engine
+                    over - type:bool - True once a new shape did not fit
+                    dirty_rows - type:set - the rows changed since a view
+                    last drew the board; the view empties it
+                    tops - type:list - for each column, the row of its
+                    highest block, height if the column is empty
+                    highest - type:int - the row of the highest block on
+                    the board, min(tops)
+                    colors - type:list - the colors of each row packed in
+                    an int, 3 bits per square (0 if empty, color index + 1)
+                    hash - type:int - the Zobrist hash of the occupied
+                    squares (see row_hash), kept up to date as rows change
+                    
+        With the 'bitboard' engine all the queries are answered by bits.
+        The board is headless unless mirror is True: adding a block
+        costs no Block and removing a row costs a few operations per
+        row, not per block. With mirror True grid mirrors bits with the
+        Block of every square, for code that wants the blocks themselves.
+        With the 'dict' engine grid is the only state.
+
+        The board does not draw anything: a view (see tetris_template.py)
+        reads colors and the current shape to put them on the screen.
+    '''
+
+    ENGINES = ['bitboard', 'dict']
+    
+    def __init__(self, width, height, engine='bitboard', mirror=False):
+        if engine not in self.ENGINES:
+            raise ValueError("unknown board engine: %r" % (engine,))
+        self.width = width
+        self.height = height
+
+        self.over = False
+        self.dirty_rows = set()
+        self.tops = [height] * width
+        self.highest = height
+        self.colors = [0] * height
+        self.hash = 0
+
+        # create an empty dictionary
+        # currently we have no shapes on the board
+        self.grid = {}
+
+        if engine == 'bitboard':
+            self.bits = BitBoard(width, height)
+            if not mirror:
+                self.grid = None
+        else:
+            self.bits = None
+
+    def draw_shape(self, shape):
+        ''' Parameters: shape - type: Shape
+            Return value: type: bool
+
+            checks if there is space on the board for the shape to be
+            drawn and returns True, otherwise it returns False
+        '''
+        return shape.can_move(self, 0, 0)
+
+    def can_move(self, x, y):
+        ''' Parameters: x - type:int
+                        y - type:int
+            Return value: type: bool
+
+            1. check if it is ok to move to square x,y
+            if the position is outside of the board boundaries, can't move there
+            return False
+
+            2. if there is already a block at that postion, can't move there
+            return False
+
+            3. otherwise return True
+            
+        '''
+
+        if self.bits is not None:
+            return self.bits.can_move(x, y)
+
+        # false if out of bounds or already a block at that key 
+        OUT_OF_BOUNDS = x < 0 or x > self.width-1 or y < 0 or y > self.height-1   
+        if OUT_OF_BOUNDS or (x,y) in self.grid:
+            return False
+
+        return True
+
+    def can_place(self, cells):
+        ''' Parameters: cells - type: list of (x, y) tuples
+            Return value: type: bool
+
+            checks if every square in cells is free,
+            i.e. if can_move is True for all of them
+        '''
+        if self.bits is not None:
+            return self.bits.can_place(cells)
+
+        for x, y in cells:
+            if not self.can_move(x, y):
+                return False
+        return True
+
+    def shape_fits(self, shape, dx, dy):
+        ''' Parameters: shape - type: Shape
+                        dx - type: int
+                        dy - type: int
+            Return value: type: bool
+
+            checks if the shape fits on the board after moving dx
+            squares in the x direction and dy squares in the y direction:
+            one pass over the blocks bounds checks each of them and, with
+            the bitboard, ORs its bit into the mask of its row, testing a
+            row with one AND when the next block is on another row
+        '''
+        width = self.width
+        height = self.height
+        if self.bits is None:
+            grid = self.grid
+            for block in shape.blocks:
+                x = block.x + dx
+                y = block.y + dy
+                if x < 0 or x >= width or y < 0 or y >= height or (x, y) in grid:
+                    return False
+            return True
+
+        rows = self.bits.rows
+        row = 0
+        mask = 0
+        for block in shape.blocks:
+            x = block.x + dx
+            y = block.y + dy
+            if x < 0 or x >= width or y < 0 or y >= height:
+                return False
+            if y != row:
+                if rows[row] & mask:
+                    return False
+                row = y
+                mask = 0
+            mask |= 1 << x
+        return not rows[row] & mask
+
+    def shape_drop(self, shape, limit=None):
+        ''' Parameters: shape - type: Shape
+                        limit - type: int - the largest distance of interest
+            Return value: type: int
+
+            returns how many squares the shape can move down, checking
+            every square on the way, at most limit.
+            While the shape is above the highest block of each of its
+            columns this is one drop_distance lookup; a shape under an
+            overhang steps down with shape_fits
+        '''
+        cells = [(block.x, block.y) for block in shape.get_blocks()]
+        for x, y in cells:
+            if y >= self.tops[x]:
+                distance = 0
+                while ((limit is None or distance < limit)
+                       and self.shape_fits(shape, 0, distance + 1)):
+                    distance += 1
+                return distance
+
+        distance = self.drop_distance(cells)
+        if limit is not None and distance > limit:
+            return limit
+        return distance
+
+    def add_shape(self, shape):
+        ''' Parameter: shape - type:Shape
+            
+            add a shape to the grid, i.e.
+            add each block to the grid using its
+            (x, y) coordinates as a dictionary key
+
+            Hint: use the get_blocks method on Shape to
+            get the list of blocks
+            
+        '''
+        
+        self.add_blocks(shape.get_blocks())
+
+    def add_blocks(self, blocks):
+        ''' Parameter: blocks - type: list of Block
+
+            adds each block to the grid using its (x, y) coordinates
+            as a dictionary key
+        '''
+        rows = set(block.y for block in blocks)
+        for y in rows:
+            self.hash ^= row_hash(y, self.row_mask(y))
+
+        grid = self.grid
+        for block in blocks:
+            if grid is not None:
+                grid[(block.x,block.y)] = block
+            if block.y < self.tops[block.x]:
+                self.tops[block.x] = block.y
+                if block.y < self.highest:
+                    self.highest = block.y
+            shift = 3 * block.x
+            self.colors[block.y] = ((self.colors[block.y] & ~(7 << shift))
+                                    | ((block.color + 1) << shift))
+
+        if self.bits is not None:
+            self.bits.add([(block.x, block.y) for block in blocks])
+        for y in rows:
+            self.hash ^= row_hash(y, self.row_mask(y))
+        self.dirty_rows.update(rows)
+
+
+    def delete_row(self, y):
+        ''' Parameters: y - type:int
+
+            remove all the blocks in row y from the grid
+            
+        '''
+        
+        #YOUR CODE HERE
+        self.hash ^= row_hash(y, self.row_mask(y))
+        if self.grid is not None:
+            for x in self.row_columns(y):
+                self.grid.pop((x,y), None)
+        self.dirty_rows.add(y)
+        self.colors[y] = 0
+        if self.bits is not None:
+            self.bits.delete_row(y)
+
+        # the columns whose highest block was in row y now start lower
+        for x in [x for x, top in enumerate(self.tops) if top == y]:
+            top = y + 1
+            while top < self.height and self.can_move(x, top):
+                top += 1
+            self.tops[x] = top
+        # the highest block is now in the first row below with a block
+        if y == self.highest:
+            while self.highest < self.height and not self.colors[self.highest]:
+                self.highest += 1
+    
+    def is_row_complete(self, y):        
+        ''' Parameter: y - type: int
+            Return value: type: bool
+
+            for each block in row y
+            check if there is a block in the grid (use the in operator) 
+            if there is one square that is not occupied, return False
+            otherwise return True
+            
+        '''
+        
+        #YOUR CODE HERE
+        if self.bits is not None:
+            return self.bits.is_row_complete(y)
+
+        for x in range(0, self.width):
+            if not (x,y) in self.grid: #if doesn't have that key, there is no block there
+                return False
+        return True
+    
+    def move_down_rows(self, y_start):
+        ''' Parameters: y_start - type:int                        
+
+            for each row from y_start to the top
+                for each column
+                    check if there is a block in the grid
+                    if there is, remove it from the grid
+                    and move the block object down
+                    and then place it back in the grid in the new position
+
+        '''
+        #print "y_start is ", y_start
+        #print "height is ", self.height
+        #print "k range is ", range(1,y_start)
+        changed = range(0, min(y_start + 2, self.height))
+        for y in changed:
+            self.hash ^= row_hash(y, self.row_mask(y))
+        for k in range(0, y_start):
+            y = y_start - k
+            if self.grid is not None:
+                for x in range(0, self.width):
+                    if (x,y) in self.grid:
+                        #print "(x,y) is", (x,y)
+                        block = self.grid.pop((x,y)) #removed and saved
+                        block.move(0, 1)
+                        self.grid[(x,y+1)] = block
+                        #print "(x,y+1) is", (x,y+1)
+            self.colors[y+1] |= self.colors[y]
+            self.colors[y] = 0
+        self.dirty_rows.update(changed)
+        for x in range(0, self.width):
+            if 1 <= self.tops[x] <= y_start:
+                self.tops[x] += 1
+        self.highest = min(self.tops)
+
+        if self.bits is not None:
+            self.bits.move_down_rows(y_start)
+        for y in changed:
+            self.hash ^= row_hash(y, self.row_mask(y))
+        
+        
+    
+    def remove_complete_rows(self, rows=None):
+        ''' Parameter: rows - type: list of int - the rows to check, e.g.
+                       the rows of the shape that was just added.
+                       Every row is checked if rows is None
+            Return value: type: list - the removed rows, top row first
+
+            removes all the complete rows
+            1. for each row, y, in rows
+            2. check if the row is complete
+                if it is, delete the row
+            3. move the rows above the deleted ones down in one pass
+               from the bottom, so every block moves at most once
+
+        '''
+
+        if rows is None:
+            rows = range(0, self.height)
+
+        cleared = sorted(set(y for y in rows if self.is_row_complete(y)))
+        for y in cleared:
+            self.delete_row(y)
+
+        if cleared:
+            self.compact_rows(cleared)
+        return cleared
+
+    def compact_rows(self, cleared):
+        ''' Parameters: cleared - type: list of int - the deleted rows,
+                        top row first
+
+            for each row from the lowest deleted row to the highest block
+                move the row down by the number of deleted rows below it
+
+            The rows move whole: the packed colors, the bitmask and the
+            key of a row each cost one operation, only the blocks of the
+            mirror move one by one
+        '''
+
+        # the rows above the highest block are empty before and after,
+        # so only the rows from there (or the highest deleted row) down
+        # to the lowest deleted row change
+        highest = self.highest
+        top = min(highest, cleared[0])
+        changed = range(top, cleared[-1] + 1)
+        for y in changed:
+            self.hash ^= row_hash(y, self.row_mask(y))
+
+        grid = self.grid
+        colors = self.colors
+        shift = 0
+        for y in range(cleared[-1], top - 1, -1):
+            if shift < len(cleared) and y == cleared[-1 - shift]:
+                shift += 1
+                continue
+            if grid is not None:
+                for x in self.row_columns(y):
+                    block = grid.pop((x,y), None)
+                    if block is not None:
+                        block.move(0, shift)
+                        grid[(x,y+shift)] = block
+            colors[y + shift] = colors[y]
+        for y in range(top, top + len(cleared)):
+            colors[y] = 0
+        if self.bits is not None:
+            self.bits.remove_rows(cleared, top)
+
+        for y in changed:
+            self.hash ^= row_hash(y, self.row_mask(y))
+        self.dirty_rows.update(changed)
+
+        # the highest block of a column either moved or is under the
+        # deleted rows; the deleted rows are empty, so none starts there
+        last = cleared[-1]
+        self.tops = [row + len(cleared) - bisect_right(cleared, row) if row < last else row
+                     for row in self.tops]
+        if highest < self.height:
+            self.highest = highest + len(cleared) - bisect_right(cleared, highest)
+
+    def drop_distance(self, cells):
+        ''' Parameters: cells - type: list of (x, y) tuples
+            Return value: type: int
+
+            returns how many squares the cells can move straight down.
+            For each column the lowest cell lands on the column's
+            highest block; only a cell tucked under an overhang has
+            to walk down its column
+        '''
+        lowest = {}
+        for x, y in cells:
+            if y > lowest.get(x, -1):
+                lowest[x] = y
+
+        distance = self.height
+        for x in lowest:
+            y = lowest[x]
+            top = self.tops[x]
+            if y >= top:
+                top = y + 1
+                while top < self.height and self.can_move(x, top):
+                    top += 1
+            if top - y - 1 < distance:
+                distance = top - y - 1
+        return distance
+
+    def row_mask(self, y):
+        ''' Parameter: y - type: int
+            Return value: type: int
+
+            returns the bitmask of the occupied squares of row y
+        '''
+        if self.bits is not None:
+            return self.bits.rows[y]
+        mask = 0
+        for x in range(0, self.width):
+            if (x,y) in self.grid:
+                mask |= 1 << x
+        return mask
+
+    def row_columns(self, y):
+        ''' Parameter: y - type: int
+            Return value: type: iterable of int
+
+            returns the columns that may hold a block in row y: with the
+            bitboard engine the set bits of the row, otherwise every
+            column
+        '''
+        if self.bits is None:
+            return range(0, self.width)
+        columns = []
+        row = self.bits.rows[y]
+        while row:
+            low = row & -row
+            columns.append(low.bit_length() - 1)
+            row ^= low
+        return columns
+
+    def pack_row(self, y):
+        ''' Parameter: y - type: int
+            Return value: type: int
+
+            packs the colors of row y of the grid, 3 bits per square
+        '''
+        packed = 0
+        for x in range(0, self.width):
+            block = self.grid.get((x,y))
+            if block is not None:
+                packed |= (block.color + 1) << (3 * x)
+        return packed
+
+    def snapshot(self):
+        ''' Return value: type: BoardState
+
+            returns the state of the board. The rows are shared, not
+            copied: the state only holds references to the row ints
+        '''
+        if self.bits is not None:
+            rows = tuple(self.bits.rows)
+        else:
+            rows = [0] * self.height
+            for x, y in self.grid:
+                rows[y] |= 1 << x
+            rows = tuple(rows)
+        return BoardState(self.width, self.height, rows, tuple(self.colors),
+                          tuple(self.tops), self.hash, self.over)
+
+    def restore(self, state):
+        ''' Parameter: state - type: BoardState - a state of a board
+                       of the same size
+
+            puts the board back in the state; only the rows whose
+            colors differ from the board's get new blocks
+        '''
+        for y in range(0, self.height):
+            changed = self.colors[y] ^ state.colors[y]
+            if not changed:
+                continue
+            self.dirty_rows.add(y)
+            if self.grid is None:
+                continue
+            packed = state.colors[y]
+            while changed:
+                x = (changed.bit_length() - 1) // 3
+                changed &= ~(7 << (3 * x))
+                color = (packed >> (3 * x)) & 7
+                if color:
+                    self.grid[(x,y)] = Block(Point(x, y), color - 1)
+                elif (x,y) in self.grid:
+                    del self.grid[(x,y)]
+
+        self.colors = list(state.colors)
+        self.tops = list(state.tops)
+        self.highest = min(state.tops)
+        self.hash = state.hash
+        self.over = state.over
+        if self.bits is not None:
+            self.bits.rows = list(state.rows)
+
+    def pose_hash(self, kind, x, y, orientation):
+        ''' Parameters: kind - type: int - index in Tetris.SHAPES
+                        x, y - type: int - the position of blocks[1]
+                        orientation - type: int - index in the shape's ROTATIONS
+            Return value: type: int
+
+            returns the key of a falling shape; xor it with hash to
+            tell apart the same board with different shapes
+        '''
+        return PIECE_KEYS[kind*4 + orientation] ^ PIVOT_KEYS[y*self.width + x]
+
+    def game_over(self):
+        ''' marks the game as over, the view displays the
+            "Game Over" message
+        '''
+        
+        #YOUR CODE HERE
+        self.over = True
+
+
+############################################################
+# BOARD STATE CLASS
+############################################################
+
+class BoardState():
+    ''' BoardState class: an immutable copy of the state of a board,
+        for search and undo
+
+        Attributes: width - type:int - width of the board in squares
+                    height - type:int - height of the board in squares
+                    rows - type:tuple - the bitmask of each row, top row first
+                    colors - type:tuple - the packed colors of each row,
+                    like Board.colors
+                    tops - type:tuple - like Board.tops
+                    hash - type:int - like Board.hash
+                    over - type:bool - like Board.over
+
+        States made from one another share the rows they did not
+        change, so a state costs height references, not a copy of
+        every square.
+    '''
+
+    __slots__ = ('width', 'height', 'rows', 'colors', 'tops', 'hash', 'over')
+
+    def __init__(self, width, height, rows, colors, tops, hash, over=False):
+        self.width = width
+        self.height = height
+        self.rows = rows
+        self.colors = colors
+        self.tops = tops
+        self.hash = hash
+        self.over = over
+
+    def can_place(self, cells):
+        ''' Parameters: cells - type: list of (x, y) tuples
+            Return value: type: bool
+
+            returns True if every square in cells is inside the board
+            and empty
+        '''
+        for x, y in cells:
+            if x < 0 or x >= self.width or y < 0 or y >= self.height:
+                return False
+            if (self.rows[y] >> x) & 1:
+                return False
+        return True
+
+    def place(self, cells, color):
+        ''' Parameters: cells - type: list of (x, y) tuples - empty squares
+                        color - type: int - index in COLORS
+            Return value: type: tuple - (the new BoardState, the removed
+                          rows, top row first)
+
+            returns the state after adding blocks on cells and removing
+            the complete rows. Only the rows the cells touch are new,
+            unless rows are removed
+        '''
+        rows = list(self.rows)
+        colors = list(self.colors)
+        tops = list(self.tops)
+        hash = self.hash
+        touched = set(y for x, y in cells)
+        for y in touched:
+            hash ^= row_hash(y, rows[y])
+        for x, y in cells:
+            rows[y] |= 1 << x
+            colors[y] |= (color + 1) << (3 * x)
+            if y < tops[x]:
+                tops[x] = y
+        for y in touched:
+            hash ^= row_hash(y, rows[y])
+
+        full_row = (1 << self.width) - 1
+        cleared = sorted(set(y for x, y in cells if rows[y] == full_row))
+        if cleared:
+            gone = set(cleared)
+            rows = [0] * len(cleared) + [row for y, row in enumerate(rows)
+                                         if y not in gone]
+            colors = [0] * len(cleared) + [row for y, row in enumerate(colors)
+                                           if y not in gone]
+            tops = [self.height] * self.width
+            seen = 0
+            for y in range(0, self.height):
+                new = rows[y] & ~seen
+                while new:
+                    low = new & -new
+                    tops[low.bit_length() - 1] = y
+                    new ^= low
+                seen |= rows[y]
+            hash = hash_rows(rows)
+
+        state = BoardState(self.width, self.height, tuple(rows), tuple(colors),
+                           tuple(tops), hash, self.over)
+        return state, cleared
+
+
+############################################################
+# PIECE SOURCE CLASS
+############################################################
+
+class PieceSource():
+    ''' PieceSource class: draws the kinds of the new shapes of a game
+        from its own generator
+        Attributes: POLICIES - type: list - 'uniform' draws every kind
+                    independently, 'bag' deals the kinds of a shuffled bag
+                    holding each of them once, then of a new bag
+                    count - type:int - the number of kinds, at most 256
+                    policy - type:string - one of POLICIES
+                    preview - type:int - the number of kinds peek shows
+                    unless told otherwise
+                    seed - type:int
+                    rng - type:Random
+                    drawn - type:bytearray - every kind drawn so far
+                    taken - type:int - the number of kinds taken,
+                    drawn[taken:] are the ones not taken yet
+                    bag - type:list - with policy 'bag', the kinds left in
+                    the bag, dealt from the end
+
+        Kinds are drawn only when peek or take needs them, and always in
+        the same order, so the preview does not change the kinds a seed
+        gives. With policy 'uniform' they are the kinds Random(seed) drew
+        for Tetris.create_new_shape before there was a preview.
+
+        The kinds of a seed are always the same, so the state of a source
+        is only its seed and the number of kinds taken: drawn is never
+        rewound, a restored source takes from it again.
+    '''
+
+    POLICIES = ['uniform', 'bag']
+    PREVIEW = 5
+
+    def __init__(self, seed, count, policy='uniform', preview=PREVIEW):
+        if policy not in self.POLICIES:
+            raise ValueError("unknown piece policy: %r" % (policy,))
+        if count > 256:
+            raise ValueError("too many kinds: %d" % count)
+        self.count = count
+        self.policy = policy
+        self.preview = preview
+        self.reseed(seed)
+
+    def reseed(self, seed):
+        ''' Parameter: seed - type: int
+
+            starts drawing the kinds of seed from the first one
+        '''
+        self.seed = seed
+        self.rng = Random(seed)
+        self.drawn = bytearray()
+        self.taken = 0
+        self.bag = []
+
+    def draw(self):
+        ''' Return value: type: int - the next kind from the generator
+        '''
+        if self.policy == 'uniform':
+            return self.rng.randrange(0, self.count)
+        if not self.bag:
+            self.bag = list(range(0, self.count))
+            self.rng.shuffle(self.bag)
+        return self.bag.pop()
+
+    def peek(self, k=None):
+        ''' Parameter: k - type: int - preview if None
+            Return value: type: list - the kinds of the next k shapes
+        '''
+        if k is None:
+            k = self.preview
+        drawn = self.drawn
+        while len(drawn) - self.taken < k:
+            drawn.append(self.draw())
+        return list(drawn[self.taken:self.taken + k])
+
+    def take(self):
+        ''' Return value: type: int - the kind of the next shape, which
+                          is no longer in the queue
+        '''
+        drawn = self.drawn
+        while len(drawn) <= self.taken:
+            drawn.append(self.draw())
+        kind = drawn[self.taken]
+        self.taken += 1
+        return kind
+
+    def skip(self, n):
+        ''' Parameter: n - type: int
+
+            takes n kinds; they are drawn when a later kind is needed
+        '''
+        self.taken += n
+
+    def snapshot(self):
+        ''' Return value: type: tuple - (seed, kinds taken), the state of
+                          the source, for restore
+        '''
+        return (self.seed, self.taken)
+
+    def restore(self, state):
+        ''' Parameter: state - type: tuple - made by snapshot
+
+            puts the source back in the state, so it gives the same
+            kinds again. A state of another seed draws its kinds again,
+            up to the ones taken
+        '''
+        seed, taken = state
+        if seed != self.seed:
+            self.reseed(seed)
+        self.taken = taken
+
+
+############################################################
+# GAME STATE CLASS
+############################################################
+
+class GameState():
+    ''' GameState class: an immutable copy of the state of a game,
+        made by Tetris.snapshot
+        Attributes: board - type:BoardState
+                    kind - type:int - index in Tetris.SHAPES of the current shape
+                    x, y - type:int - the position of blocks[1] of the current shape
+                    orientation - type:int - index in the shape's ROTATIONS
+                    rotation_dir - type:int - the shape's rotation direction
+                    source - type:tuple - the state of the game's PieceSource
+                    pieces - type:int
+                    lines - type:int
+    '''
+
+    __slots__ = ('board', 'kind', 'x', 'y', 'orientation', 'rotation_dir',
+                 'source', 'pieces', 'lines')
+
+    def __init__(self, board, kind, x, y, orientation, rotation_dir, source,
+                 pieces, lines):
+        self.board = board
+        self.kind = kind
+        self.x = x
+        self.y = y
+        self.orientation = orientation
+        self.rotation_dir = rotation_dir
+        self.source = source
+        self.pieces = pieces
+        self.lines = lines
+
+
+############################################################
+# TETRIS CLASS
+############################################################
+
+class Tetris():
+    ''' Tetris class: Controls the game play
+    Attributes:
+    SHAPES - type: list (list of Shape classes)
+    DIRECTION - type: dictionary - converts string direction to (dx, dy)
+    BOARD_WIDTH - type:int - the width of the board, unless the game
+    is given one
+    BOARD_HEIGHT - type:int - the height of the board, unless the game
+    is given one
+    board - type:Board - the tetris board
+    current_shapes - type: Shape - the current moving shape on the board
+    seed - type:int - the seed of source
+    source - type:PieceSource - draws the kinds of the new shapes of
+    this game, with the policy and preview the game is given
+    pieces - type:int - the number of shapes added to the board
+    lines - type:int - the number of rows removed
+    lock_hooks - type:list - functions called each time a shape is added
+    to the board, as hook(game, board, pose, cleared): board is the
+    BoardState before the shape was added, pose the (kind, x, y,
+    orientation) of the shape as for create_shape and cleared the rows
+    it completed
+    '''
+
+    SHAPES = [I_shape, J_shape, L_shape, O_shape, S_shape, T_shape, Z_shape]
+    DIRECTION = {'Left':(-1, 0), 'Right':(1, 0), 'Down':(0, 1)}
+    BOARD_WIDTH = 10
+    BOARD_HEIGHT = 20
+    
+    def __init__(self, engine='bitboard', seed=None, width=None, height=None,
+                 policy='uniform', preview=PieceSource.PREVIEW, mirror=False):
+        self.board = Board(width or self.BOARD_WIDTH, height or self.BOARD_HEIGHT,
+                           engine, mirror)
+
+        # every game draws its shapes from its own generator, so the
+        # same seed and the same moves always give the same game
+        if seed is None:
+            seed = randrange(0, 1 << 32)
+        self.seed = seed
+        self.source = PieceSource(seed, len(self.SHAPES), policy, preview)
+        self.pieces = 0
+        self.lines = 0
+        self.lock_hooks = []
+
+        # set the current shape to a random new shape
+        self.current_shape = self.create_new_shape()
+
+        # Check the current_shape fits on the board (take a look at the
+        # draw_shape method in the Board class)
+        self.board.draw_shape(self.current_shape)
+
+
+    def create_new_shape(self):
+        ''' Return value: type: Shape
+            
+        Create a new shape of the next kind of source that is
+        centered at y = 0 and x = int(self.board.width/2)
+        return the shape
+        '''
+
+        #YOUR CODE HERE
+        rand = self.source.take()
+        q = self.SHAPES[rand](Point(int(self.board.width/2), 0))
+        #q = O_shape(Point(int(self.board.width/2), 0))
+        return q
+    
+    def do_move(self, direction):
+        ''' Parameters: direction - type: string
+            Return value: type: bool
+
+            Move the current shape in the direction specified by the parameter:
+            First check if the shape can move. If it can, move it and return True
+            Otherwise if the direction we tried to move was 'Down',
+            1. add the current shape to the board
+            2. remove the completed rows if any 
+            3. create a new random shape and set current_shape attribute
+            4. If the shape cannot be drawn on the board, display a
+               game over message
+
+            return False
+
+            'space' drops the shape all the way down and adds it to
+            the board, and 'Up' rotates the shape.
+
+        '''
+        
+        #YOUR CODE HERE
+
+        if direction == 'Down':
+            dx = self.DIRECTION[direction][0]
+            dy = self.DIRECTION[direction][1]
+            # one query tells both if the shape can move down one square
+            # and if it will still be able to move after that
+            drop = self.board.shape_drop(self.current_shape, 2)
+            DOWN_ONE = drop >= 1
+            DOWN_TWO = drop >= 2
+
+            if DOWN_ONE:
+                self.current_shape.move(dx,dy) #move down one
+
+            if not DOWN_TWO or not DOWN_ONE:
+                self.lock_shape()
+                return False #can no longer move
+            else:
+                return True #has moved
+        elif direction == 'space':
+            self.hard_drop()
+            return False
+        elif direction == 'Up':
+            self.do_rotate()
+        else: #direction not down or up
+            dx = self.DIRECTION[direction][0]
+            dy = self.DIRECTION[direction][1]
+            if self.current_shape.can_move(self.board, dx, dy):
+                self.current_shape.move(dx,dy)
+                return True
+            return False
+
+
+
+        #     if DOWN_ONE and not DOWN_TWO: #can move down only once
+        #         self.current_shape.move(dx,dy) #move down one
+        #         print "adding shape"
+        #         self.board.add_shape(self.current_shape) #add to board
+        #         print "added shape"
+        #         print "removing complete rows"
+        #         self.board.remove_complete_rows()
+        #         print "removed"
+        #         self.current_shape = self.create_new_shape() #new shape added
+        #         if not self.board.draw_shape(self.current_shape):
+        #             self.game_over()
+        #         return False #can no longer move
+        #     elif not DOWN_ONE: #can't move down
+        #         print "adding shape"
+        #         self.board.add_shape(self.current_shape) #add to board
+        #         print "added shape"
+        #         print "removing complete rows"
+        #         self.board.remove_complete_rows()
+        #         print "removed"
+        #         self.current_shape = self.create_new_shape() #new shape added
+        #         if not self.board.draw_shape(self.current_shape):
+        #             self.game_over()
+        #         return False #can no longer move
+        #     else: #can move like it wants
+        #         self.current_shape.move(dx,dy)
+        #         return True
+        # else: # dir is not down
+
+
+
+        # if self.current_shape.can_move(self.board, dx, dy):
+        #     self.current_shape.move(dx,dy)
+        #     return True
+        # else:
+        #     print "key_pressed CANNOT move"
+        #     print "direction = ", direction
+        #     if direction == 'Down':
+        #         print "adding shape"
+        #         self.board.add_shape(self.current_shape)
+        #         print "added shape"
+        #         print "removing complete rows"
+        #         self.board.remove_complete_rows()
+        #         print "removed"
+        #         self.current_shape = self.create_new_shape()
+        #         if not self.board.draw_shape(self.current_shape):
+        #             self.game_over()
+
+        #     return False
+
+
+    def lock_shape(self):
+        ''' 1. add the current shape to the board
+            2. remove the completed rows if any 
+            3. create a new random shape and set current_shape attribute
+            4. If the shape cannot be drawn on the board, mark the
+               game as over
+            5. call the lock hooks
+        '''
+        shape = self.current_shape
+        if self.lock_hooks:
+            # the blocks move with the rows once they are on the board
+            before = self.board.snapshot()
+            pivot = shape.blocks[1]
+            pose = (self.SHAPES.index(type(shape)), pivot.x, pivot.y,
+                    shape.orientation)
+        self.board.add_shape(shape) #add to board
+        cleared = self.board.remove_complete_rows(
+            [block.y for block in shape.get_blocks()])
+        self.pieces += 1
+        self.lines += len(cleared)
+        self.current_shape = self.create_new_shape() #new shape added
+        if not self.board.draw_shape(self.current_shape):
+            self.board.game_over()
+
+        for hook in self.lock_hooks:
+            hook(self, before, pose, cleared)
+
+    def get_landing_positions(self):
+        ''' Return value: type: list of (x, y) tuples
+
+            returns the squares the current shape would land on if
+            it was dropped straight down (the ghost piece)
+        '''
+        cells = [(block.x, block.y) for block in self.current_shape.get_blocks()]
+        distance = self.board.shape_drop(self.current_shape)
+        return [(x, y + distance) for x, y in cells]
+
+    def hard_drop(self):
+        ''' moves the current shape down until it can no longer move
+            and adds it to the board
+        '''
+        self.current_shape.move(0, self.board.shape_drop(self.current_shape))
+        self.lock_shape()
+
+    def create_shape(self, kind, x, y, orientation):
+        ''' Parameters: kind - type: int - index in SHAPES
+                        x, y - type: int - the position of blocks[1]
+                        orientation - type: int - index in the shape's ROTATIONS
+            Return value: type: Shape
+
+            creates a shape of the kind, turned and moved to x, y
+        '''
+        shape = self.SHAPES[kind](Point(int(self.board.width/2), 0))
+        for i in range(0, orientation):
+            shape.rotate(self.board)
+        pivot = shape.blocks[1]
+        shape.move(x - pivot.x, y - pivot.y)
+        return shape
+
+    def snapshot(self):
+        ''' Return value: type: GameState
+
+            returns the state of the game
+        '''
+        shape = self.current_shape
+        pivot = shape.blocks[1]
+        return GameState(self.board.snapshot(), self.SHAPES.index(type(shape)),
+                         pivot.x, pivot.y, shape.orientation, shape.rotation_dir,
+                         self.source.snapshot(), self.pieces, self.lines)
+
+    def restore(self, state):
+        ''' Parameter: state - type: GameState
+
+            puts the game back in the state
+        '''
+        self.board.restore(state.board)
+        self.current_shape = self.create_shape(state.kind, state.x, state.y,
+                                               state.orientation)
+        self.current_shape.rotation_dir = state.rotation_dir
+        self.source.restore(state.source)
+        self.pieces = state.pieces
+        self.lines = state.lines
+
+    def state_hash(self):
+        ''' Return value: type: int
+
+            returns the Zobrist hash of the board and the current shape
+            (kind, position and orientation)
+        '''
+        shape = self.current_shape
+        pivot = shape.blocks[1]
+        return self.board.hash ^ self.board.pose_hash(
+            self.SHAPES.index(type(shape)), pivot.x, pivot.y, shape.orientation)
+
+    def do_rotate(self):
+        ''' Checks if the current_shape can be rotated and
+            rotates if it can
+        '''
+        
+        if self.current_shape.can_rotate(self.board):
+            self.current_shape.rotate(self.board)
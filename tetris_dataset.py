@@ -0,0 +1,167 @@
+import os
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from tetris_core import Tetris
+
+############################################################
+# RECORDS
+############################################################
+
+def record_dtype(height):
+    ''' Parameter: height - type: int - the height of the boards
+        Return value: type: numpy dtype
+
+        one record per shape added to a board:
+        seed - the seed of the game
+        piece - how many shapes the game added before this one
+        board - the rows of the board before the shape was added, as
+                bitmasks (bit x of row y set if square (x, y) is occupied),
+                so boards are at most 63 squares wide
+        kind - the shape, an index in Tetris.SHAPES
+        x, y, orientation - where the shape was added: the position of
+                blocks[1] and the index in the shape's ROTATIONS
+        cleared - the rows the shape completed
+        lines - the rows the game cleared so far, this shape's included
+        over - whether the next shape did not fit
+    '''
+    return np.dtype([('seed', '<u8'), ('piece', '<u4'),
+                     ('board', '<i8', (height,)), ('kind', 'u1'),
+                     ('x', '<i2'), ('y', '<i2'), ('orientation', 'u1'),
+                     ('cleared', 'u1'), ('lines', '<u4'), ('over', '?')])
+
+
+############################################################
+# SHARD WRITER CLASS
+############################################################
+
+class ShardWriter():
+    ''' ShardWriter class: appends a record to a memory-mapped .npy file
+        each time a shape is added to the board of an attached game
+        Attributes: directory - type: string - where the shards go
+                    prefix - type: string - shards are named prefix-00000.npy,
+                    prefix-00001.npy, ...
+                    shard_size - type: int - the records in a full shard;
+                    a new shard is started when one is full
+                    dtype - type: numpy dtype - see record_dtype
+                    paths - type: list - the shards written so far
+                    shard - type: memmap - the shard being filled
+                    filled - type: int - the records in shard
+                    records - type: int - the records written so far
+    '''
+
+    def __init__(self, directory, height=Tetris.BOARD_HEIGHT,
+                 shard_size=1 << 16, prefix='shard'):
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.directory = directory
+        self.prefix = prefix
+        self.shard_size = shard_size
+        self.dtype = record_dtype(height)
+        self.paths = []
+        self.shard = None
+        self.filled = 0
+        self.records = 0
+
+    def attach(self, game):
+        ''' Parameter: game - type: Tetris
+
+            records every shape added to the game's board from now on
+        '''
+        if game.board.width > 63:
+            raise ValueError("boards wider than 63 squares do not fit in an int64 row")
+        if game.board.height != self.dtype['board'].shape[0]:
+            raise ValueError("the shards hold boards %d rows high, not %d"
+                             % (self.dtype['board'].shape[0], game.board.height))
+        game.lock_hooks.append(self.write)
+
+    def write(self, game, board, pose, cleared):
+        ''' the lock hook, see Tetris.lock_hooks
+        '''
+        if self.shard is None or self.filled == self.shard_size:
+            self.start_shard()
+
+        record = self.shard[self.filled]
+        record['seed'] = game.seed
+        record['piece'] = game.pieces - 1
+        record['board'] = board.rows
+        record['kind'], record['x'], record['y'], record['orientation'] = pose
+        record['cleared'] = len(cleared)
+        record['lines'] = game.lines
+        record['over'] = game.board.over
+        self.filled += 1
+        self.records += 1
+
+    def start_shard(self):
+        self.finish_shard()
+        path = os.path.join(self.directory,
+                            '%s-%05d.npy' % (self.prefix, len(self.paths)))
+        self.shard = open_memmap(path, mode='w+', dtype=self.dtype,
+                                 shape=(self.shard_size,))
+        self.paths.append(path)
+        self.filled = 0
+
+    def finish_shard(self):
+        ''' flushes the shard being filled; a shard that is not full
+            is copied to one of the right size
+        '''
+        if self.shard is None:
+            return
+        shard = self.shard
+        self.shard = None
+        shard.flush()
+        if self.filled < self.shard_size:
+            path = self.paths[-1]
+            short = open_memmap(path + '.tmp', mode='w+', dtype=self.dtype,
+                                shape=(self.filled,))
+            short[:] = shard[:self.filled]
+            short.flush()
+            del short, shard
+            os.replace(path + '.tmp', path)
+
+    def close(self):
+        self.finish_shard()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+############################################################
+# SHARD READER CLASS
+############################################################
+
+class ShardReader():
+    ''' ShardReader class: reads the records of a ShardWriter without
+        copying them
+        Attributes: paths - type: list - the shards, in order
+                    shards - type: list of memmap - one per path
+    '''
+
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self.shards = [np.load(path, mmap_mode='r') for path in self.paths]
+
+    @classmethod
+    def from_directory(cls, directory, prefix='shard'):
+        names = sorted(name for name in os.listdir(directory)
+                       if name.startswith(prefix + '-') and name.endswith('.npy'))
+        return cls([os.path.join(directory, name) for name in names])
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards)
+
+    def batches(self, batch_size):
+        ''' Parameter: batch_size - type: int
+            Return value: type: generator of record arrays
+
+            yields the records batch_size at a time, as read-only views
+            of the shards; a batch does not cross shards, so the last
+            batch of each shard may be shorter
+        '''
+        for shard in self.shards:
+            for start in range(0, len(shard), batch_size):
+                yield shard[start:start + batch_size]
@@ -0,0 +1,275 @@
+from random import Random
+
+import numpy as np
+
+from tetris_core import Tetris
+from tetris_search import find_placements
+
+############################################################
+# ACTIONS AND OBSERVATIONS
+############################################################
+#
+# With mode 'keys' an action is an index in KEYS, played with Tetris.do_move.
+# With mode 'placements' an action is orientation*width + x: the shape is
+# turned to that orientation, brought to column x (the column of blocks[1])
+# and locked there, with the keys find_placements gives. When several
+# placements share the orientation and column, the lowest one is used.
+#
+# An observation is a (height, width) uint8 array: 0 for an empty square,
+# 1 for a block of the board, 2 for a block of the falling shape.
+
+KEYS = ['Left', 'Right', 'Down', 'Up', 'space']
+MODES = ['keys', 'placements']
+
+
+def write_observation(game, out):
+    ''' Parameters: game - type: Tetris
+                    out - type: array (height, width) of uint8
+
+        writes the observation of the game into out
+    '''
+    out.fill(0)
+    for y, packed in enumerate(game.board.colors):
+        x = 0
+        while packed:
+            if packed & 7:
+                out[y, x] = 1
+            packed >>= 3
+            x += 1
+    for block in game.current_shape.get_blocks():
+        out[block.y, block.x] = 2
+
+
+def placement_actions(game):
+    ''' Parameter: game - type: Tetris
+        Return value: type: dict - action -> Placement
+
+        returns the placements of the current shape by action number
+    '''
+    width = game.board.width
+    actions = {}
+    for placement in find_placements(game.board, game.current_shape):
+        action = placement.orientation*width + placement.x
+        if action not in actions or placement.y > actions[action].y:
+            actions[action] = placement
+    return actions
+
+
+def play_action(game, mode, action, placements=None):
+    ''' Parameters: game - type: Tetris
+                    mode - type: string - one of MODES
+                    action - type: int
+                    placements - type: dict - placement_actions(game),
+                    needed with mode 'placements'
+        Return value: type: int - the rows the action cleared
+    '''
+    lines = game.lines
+    if mode == 'keys':
+        if not 0 <= action < len(KEYS):
+            raise ValueError("no key for action %r" % (action,))
+        game.do_move(KEYS[action])
+    else:
+        if action not in placements:
+            raise ValueError("the shape cannot be placed with action %r" % (action,))
+        for key in placements[action].keys:
+            game.do_move(key)
+    return game.lines - lines
+
+
+############################################################
+# TETRIS ENVIRONMENT CLASS
+############################################################
+
+class TetrisEnv():
+    ''' TetrisEnv class: a game without a window behind the reset() and
+        step(action) interface of reinforcement learning environments
+
+        Attributes: mode - type: string - one of MODES
+                    engine - type: string - the board engine of the games
+                    width, height - type: int - size of their boards
+                    actions - type: int - the number of actions
+                    shape - type: tuple - the shape of an observation
+                    game - type: Tetris - the game being played
+                    placements - type: dict - with mode 'placements', the
+                    placements of the current shape by action
+    '''
+
+    def __init__(self, mode='keys', engine='bitboard', width=Tetris.BOARD_WIDTH,
+                 height=Tetris.BOARD_HEIGHT):
+        if mode not in MODES:
+            raise ValueError("unknown action mode: %r" % (mode,))
+        self.mode = mode
+        self.engine = engine
+        self.width = width
+        self.height = height
+        if mode == 'keys':
+            self.actions = len(KEYS)
+        else:
+            self.actions = 4 * width
+        self.shape = (height, width)
+        self.game = None
+        self.placements = None
+
+    def reset(self, seed=None):
+        ''' Parameter: seed - type: int - the seed of the new game,
+                       random if None
+            Return value: type: array - the first observation
+        '''
+        self.game = Tetris(self.engine, seed, self.width, self.height)
+        self.update_placements()
+        return self.observe()
+
+    def step(self, action):
+        ''' Parameter: action - type: int
+            Return value: type: tuple - (observation, reward, done, info)
+
+            plays the action; the reward is the number of rows it
+            cleared, done is True once the game is over. info holds the
+            game's lines and pieces and the action_mask of the next shape
+        '''
+        if self.game is None or self.game.board.over:
+            raise RuntimeError("the game is over, call reset()")
+        reward = play_action(self.game, self.mode, action, self.placements)
+        self.update_placements()
+
+        info = {'lines': self.game.lines, 'pieces': self.game.pieces,
+                'action_mask': self.action_mask()}
+        return self.observe(), reward, self.game.board.over, info
+
+    def update_placements(self):
+        if self.mode == 'placements' and not self.game.board.over:
+            self.placements = placement_actions(self.game)
+        else:
+            self.placements = None
+
+    def observe(self):
+        ''' Return value: type: array (height, width) of uint8
+        '''
+        out = np.empty(self.shape, dtype=np.uint8)
+        write_observation(self.game, out)
+        return out
+
+    def action_mask(self):
+        ''' Return value: type: array (actions,) of bool - the actions
+                          that can be played
+        '''
+        mask = np.zeros(self.actions, dtype=bool)
+        if self.mode == 'keys':
+            mask[:] = not self.game.board.over
+        elif self.placements:
+            mask[list(self.placements)] = True
+        return mask
+
+
+############################################################
+# VECTOR TETRIS ENVIRONMENT CLASS
+############################################################
+
+class VectorTetrisEnv():
+    ''' VectorTetrisEnv class: steps many games at once. The outputs are
+        written into arrays made once, so a step does not allocate them;
+        they are overwritten by the next step
+
+        Attributes: count - type: int - the number of games
+                    mode, engine, width, height, actions - like TetrisEnv
+                    games - type: list of Tetris
+                    placements - type: list - like TetrisEnv.placements,
+                    one per game
+                    rng - type: Random - draws the seeds of the new games
+                    observations - type: array (count, height, width) of uint8
+                    rewards - type: array (count,) of int64
+                    dones - type: array (count,) of bool
+                    lines, pieces - type: array (count,) of int64 - the
+                    counters of the games being played
+                    masks - type: array (count, actions) of bool - the
+                    action masks
+                    infos - type: list of dict - one per game, like the
+                    info of TetrisEnv.step; action_mask is a row of masks
+
+        A game that is over is replaced by a new one in the same step:
+        dones tells which were, the observation and action mask are the
+        new game's, the lines and pieces of the info the ended game's.
+    '''
+
+    def __init__(self, count, mode='keys', engine='bitboard', seed=None,
+                 width=Tetris.BOARD_WIDTH, height=Tetris.BOARD_HEIGHT):
+        if mode not in MODES:
+            raise ValueError("unknown action mode: %r" % (mode,))
+        self.count = count
+        self.mode = mode
+        self.engine = engine
+        self.width = width
+        self.height = height
+        if mode == 'keys':
+            self.actions = len(KEYS)
+        else:
+            self.actions = 4 * width
+        self.rng = Random(seed)
+        self.games = [None] * count
+        self.placements = [None] * count
+
+        self.observations = np.zeros((count, height, width), dtype=np.uint8)
+        self.rewards = np.zeros(count, dtype=np.int64)
+        self.dones = np.zeros(count, dtype=bool)
+        self.lines = np.zeros(count, dtype=np.int64)
+        self.pieces = np.zeros(count, dtype=np.int64)
+        self.masks = np.zeros((count, self.actions), dtype=bool)
+        self.infos = [{'lines': 0, 'pieces': 0, 'action_mask': self.masks[i]}
+                      for i in range(0, count)]
+
+    def reset(self, seeds=None):
+        ''' Parameter: seeds - type: list of int - one seed per game,
+                       drawn from rng if None
+            Return value: type: array - observations
+        '''
+        for i in range(0, self.count):
+            self.start_game(i, None if seeds is None else seeds[i])
+        self.rewards.fill(0)
+        self.dones.fill(False)
+        return self.observations
+
+    def start_game(self, i, seed=None):
+        if seed is None:
+            seed = self.rng.getrandbits(32)
+        self.games[i] = Tetris(self.engine, seed, self.width, self.height)
+        self.update(i)
+
+    def update(self, i):
+        ''' Parameter: i - type: int
+
+            writes the observation, counters and action mask of game i
+        '''
+        game = self.games[i]
+        write_observation(game, self.observations[i])
+        self.lines[i] = game.lines
+        self.pieces[i] = game.pieces
+
+        mask = self.masks[i]
+        if self.mode == 'keys':
+            mask.fill(True)
+        else:
+            self.placements[i] = placement_actions(game)
+            mask.fill(False)
+            for action in self.placements[i]:
+                mask[action] = True
+
+    def step(self, actions):
+        ''' Parameter: actions - type: array (count,) of int
+            Return value: type: tuple - (observations, rewards, dones, infos)
+
+            plays one action in every game and starts a new game in the
+            place of each game that ended
+        '''
+        for i in range(0, self.count):
+            game = self.games[i]
+            self.rewards[i] = play_action(game, self.mode, int(actions[i]),
+                                          self.placements[i])
+            self.dones[i] = game.board.over
+            info = self.infos[i]
+            info['lines'] = game.lines
+            info['pieces'] = game.pieces
+            if game.board.over:
+                self.start_game(i)
+            else:
+                self.update(i)
+        return self.observations, self.rewards, self.dones, self.infos
@@ -0,0 +1,132 @@
+import numpy as np
+
+############################################################
+# BOARD FEATURES
+############################################################
+#
+# Boards are given as a stack of row bitmasks, shape (boards, height), bit x
+# of row y set if square (x, y) is occupied: the layout of BatchTetris.rows
+# and Board.bits.rows.
+
+FEATURES = ['height', 'lines', 'holes', 'bumpiness', 'wells', 'max_height']
+
+### weights from Yiyuan Lee's "Tetris AI - The (Near) Perfect Bot";
+### wells and max_height are not in it
+DEFAULT_WEIGHTS = {'height': -0.510066, 'lines': 0.760666, 'holes': -0.35663,
+                   'bumpiness': -0.184483, 'wells': 0.0, 'max_height': 0.0}
+
+
+def placement_rows(board, placements):
+    ''' Parameters: board - type: Board
+                    placements - type: list of Placement - see tetris_search
+        Return value: type: array (len(placements), board.height)
+
+        returns one board per placement: the rows of the board with
+        the blocks of the placement added, complete rows not removed
+    '''
+    if board.bits is not None:
+        rows = board.bits.rows
+    else:
+        rows = [0] * board.height
+        for x, y in board.grid:
+            rows[y] |= 1 << x
+
+    boards = np.tile(np.array(rows, dtype=np.int64), (len(placements), 1))
+    for i, placement in enumerate(placements):
+        for x, y in placement.cells:
+            boards[i, y] |= 1 << x
+    return boards
+
+
+def board_features(rows, width):
+    ''' Parameters: rows - type: array (boards, height) of row bitmasks
+                    width - type: int - the width of the boards
+        Return value: type: array (boards, len(FEATURES)) - one column
+                      per name in FEATURES
+
+        computes, for every board at once:
+        lines - the complete rows; they are removed before the other
+                features are measured
+        height - the sum of the column heights
+        holes - the empty squares with a block above them
+        bumpiness - the sum of the height differences of neighbour columns
+        wells - the sum of the depths of the columns lower than both
+                neighbours (the walls count as full columns)
+        max_height - the height of the highest column
+    '''
+    if width > 62:
+        raise ValueError("boards wider than 62 squares do not fit in an int64 row")
+    rows = np.asarray(rows, dtype=np.int64)
+    count, height = rows.shape
+    full_row = (1 << width) - 1
+
+    # remove the complete rows the way BatchTetris.lock does
+    full = rows == full_row
+    lines = full.sum(axis=1)
+    order = np.argsort(~full, axis=1, kind='stable')
+    rows = np.take_along_axis(rows, order, axis=1)
+    rows[np.arange(height)[None, :] < lines[:, None]] = 0
+
+    filled = ((rows[:, :, None] >> np.arange(width)) & 1).astype(bool)
+    occupied = filled.any(axis=1)
+    heights = np.where(occupied, height - np.argmax(filled, axis=1), 0)
+
+    covered = np.logical_or.accumulate(filled, axis=1)
+    holes = (covered & ~filled).sum(axis=(1, 2))
+
+    bumpiness = np.abs(np.diff(heights, axis=1)).sum(axis=1)
+
+    walls = np.full((count, 1), height, dtype=heights.dtype)
+    padded = np.concatenate([walls, heights, walls], axis=1)
+    sides = np.minimum(padded[:, :-2], padded[:, 2:])
+    wells = np.maximum(sides - heights, 0).sum(axis=1)
+
+    features = np.empty((count, len(FEATURES)), dtype=np.float64)
+    features[:, 0] = heights.sum(axis=1)
+    features[:, 1] = lines
+    features[:, 2] = holes
+    features[:, 3] = bumpiness
+    features[:, 4] = wells
+    features[:, 5] = heights.max(axis=1)
+    return features
+
+
+############################################################
+# FEATURE EVALUATOR CLASS
+############################################################
+
+class FeatureEvaluator():
+    ''' FeatureEvaluator class: scores boards with a weighted sum
+        of their features
+        Attributes: weights - type: array (len(FEATURES),) - the weight
+                    of each feature, in the order of FEATURES
+    '''
+
+    def __init__(self, weights=None):
+        ''' Parameter: weights - type: dict - feature name -> weight;
+                       the missing features get their DEFAULT_WEIGHTS
+        '''
+        merged = dict(DEFAULT_WEIGHTS)
+        if weights is not None:
+            for name in weights:
+                if name not in FEATURES:
+                    raise ValueError("unknown board feature: %r" % (name,))
+            merged.update(weights)
+        self.weights = np.array([merged[name] for name in FEATURES],
+                                dtype=np.float64)
+
+    def score(self, rows, width):
+        ''' Parameters: rows - type: array (boards, height) of row bitmasks
+                        width - type: int
+            Return value: type: array (boards,) - higher is better
+        '''
+        return board_features(rows, width) @ self.weights
+
+    def score_placements(self, board, placements):
+        ''' Parameters: board - type: Board
+                        placements - type: list of Placement
+            Return value: type: array (len(placements),)
+
+            scores the board left by each placement of the falling shape
+        '''
+        return self.score(placement_rows(board, placements), board.width)
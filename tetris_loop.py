@@ -0,0 +1,86 @@
+from collections import deque
+
+############################################################
+# INPUT QUEUE CLASS
+############################################################
+
+class InputQueue():
+    ''' InputQueue class: holds the keys pressed between two frames
+        Attributes: keys - type:deque - the keys waiting, oldest first
+                    size - type:int - the most keys kept; more are dropped
+                    dropped - type:int - the keys dropped so far
+
+        A key equal to the last key waiting is dropped, except 'space':
+        the repeat events the OS sends while a key is held collapse into
+        one move per frame, two hard drops are two shapes.
+    '''
+
+    def __init__(self, size=8):
+        self.keys = deque()
+        self.size = size
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def push(self, key):
+        ''' Parameter: key - type: string
+            Return value: type: bool - False if the key was dropped
+        '''
+        if (len(self.keys) >= self.size
+                or (self.keys and self.keys[-1] == key and key != 'space')):
+            self.dropped += 1
+            return False
+        self.keys.append(key)
+        return True
+
+    def drain(self):
+        ''' Return value: type: list - the keys waiting, oldest first;
+                          the queue is empty afterwards
+        '''
+        keys = list(self.keys)
+        self.keys.clear()
+        return keys
+
+
+############################################################
+# FIXED STEP CLASS
+############################################################
+
+class FixedStep():
+    ''' FixedStep class: a clock that ticks every period seconds of
+        wall time, however late it is asked
+        Attributes: period - type:float - seconds between two ticks
+                    next_time - type:float - when the next tick is due
+                    max_late - type:int - the most ticks a late caller
+                    catches up on; the ones before are skipped
+                    skipped - type:int - the ticks skipped so far
+
+        Ticks are due at start + k*period, so the time spent between
+        two calls does not delay the ticks after them.
+    '''
+
+    def __init__(self, period, now, max_late=2):
+        self.period = period
+        self.next_time = now + period
+        self.max_late = max_late
+        self.skipped = 0
+
+    def due(self, now):
+        ''' Parameter: now - type: float - the time, in seconds
+            Return value: type: int - the ticks due by now
+        '''
+        if now < self.next_time:
+            return 0
+        ticks = int((now - self.next_time) / self.period) + 1
+        self.next_time += ticks * self.period
+        if ticks > self.max_late:
+            self.skipped += ticks - self.max_late
+            ticks = self.max_late
+        return ticks
+
+    def wait(self, now):
+        ''' Parameter: now - type: float
+            Return value: type: float - seconds until the next tick
+        '''
+        return max(0.0, self.next_time - now)
@@ -0,0 +1,202 @@
+import math
+from time import perf_counter
+
+############################################################
+# HISTOGRAM CLASS
+############################################################
+
+class Histogram():
+    ''' Histogram class: durations in buckets that grow by 2**(1/8),
+        about 9% each, from one microsecond up
+        Attributes: buckets - type:Dictionary - bucket index -> count
+                    count - type:int - the durations added
+                    total - type:float - their sum, in seconds
+                    max - type:float - the longest, in seconds
+    '''
+
+    STEPS = 8
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        micros = seconds * 1e6
+        if micros < 1.0:
+            index = 0
+        else:
+            index = int(math.log2(micros) * self.STEPS) + 1
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        ''' Parameter: p - type: float - between 0 and 100
+            Return value: type: float - in seconds, the upper bound of
+                          the bucket holding the p-th percentile
+        '''
+        if not self.count:
+            return 0.0
+        rank = p / 100.0 * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(2.0 ** (index / float(self.STEPS)) / 1e6, self.max)
+        return self.max
+
+
+############################################################
+# METRICS CLASS
+############################################################
+
+class Metrics():
+    ''' Metrics class: times the hot paths of a game and counts the
+        work they do
+        Attributes: histograms - type:Dictionary - name -> Histogram
+                    counters - type:Dictionary - name -> int
+                    pending - type:list - when each key queued but not
+                    yet drawn was pressed
+                    last_frame - type:float - when the last frame started
+
+        Nothing is measured until install_game or install_window wraps
+        the methods of a game, one instance at a time, so a game that is
+        not installed runs the code it always ran.
+
+        Histograms: move (Tetris.do_move), rotate, lock, clear
+        (Board.remove_complete_rows), render (BoardView.render),
+        latency (key press to the end of the render that shows it),
+        frame (the time a frame takes) and frame_interval (between the
+        starts of two frames).
+        Counters: collisions (Board.shape_fits, can_place and can_move
+        calls) and canvas_ops (Rectangles refilled or moved).
+    '''
+
+    HOTKEY = 'F12'
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self.pending = []
+        self.last_frame = None
+
+    def histogram(self, name):
+        if name not in self.histograms:
+            self.histograms[name] = Histogram()
+        return self.histograms[name]
+
+    def timed(self, name, function):
+        ''' Parameters: name - type: string
+                        function - the function to time
+            Return value: a function that calls function and adds its
+                          duration to the histogram name
+        '''
+        histogram = self.histogram(name)
+
+        def timed_function(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.add(perf_counter() - start)
+        return timed_function
+
+    def counted(self, name, function):
+        ''' Parameters: name - type: string
+                        function - the function to count
+            Return value: a function that calls function and adds one
+                          to the counter name
+        '''
+        self.counters.setdefault(name, 0)
+        counters = self.counters
+
+        def counted_function(*args, **kwargs):
+            counters[name] += 1
+            return function(*args, **kwargs)
+        return counted_function
+
+    def install_game(self, game):
+        ''' Parameter: game - type: Tetris
+
+            measures the moves of the game and the collision checks
+            of its board
+        '''
+        game.do_move = self.timed('move', game.do_move)
+        game.do_rotate = self.timed('rotate', game.do_rotate)
+        game.lock_shape = self.timed('lock', game.lock_shape)
+
+        board = game.board
+        board.remove_complete_rows = self.timed('clear', board.remove_complete_rows)
+        for name in ('shape_fits', 'can_place', 'can_move'):
+            setattr(board, name, self.counted('collisions', getattr(board, name)))
+
+    def install_window(self, game):
+        ''' Parameter: game - type: TkTetris - before it binds the keys
+                       and starts the frames
+
+            measures the game, its rendering, its frames and the time
+            from each key press the game queued to the frame that draws
+            it. The HOTKEY prints the report
+        '''
+        self.install_game(game)
+        view = game.view
+        view.fill = self.counted('canvas_ops', view.fill)
+        view.move = self.counted('canvas_ops', view.move)
+
+        render = self.timed('render', view.render)
+        latency = self.histogram('latency')
+
+        def render_and_measure(*args):
+            render(*args)
+            now = perf_counter()
+            for pressed in self.pending:
+                latency.add(now - pressed)
+            del self.pending[:]
+        view.render = render_and_measure
+
+        key_pressed = game.key_pressed
+
+        def key_pressed_and_measure(event):
+            if event.keysym == self.HOTKEY:
+                print(self.report())
+                return False
+            # only a key that was queued is drawn by a frame
+            pressed = perf_counter()
+            queued = key_pressed(event)
+            if queued:
+                self.pending.append(pressed)
+            return queued
+        game.key_pressed = key_pressed_and_measure
+
+        frame = self.timed('frame', game.animate_frame)
+        interval = self.histogram('frame_interval')
+
+        def frame_and_measure():
+            now = perf_counter()
+            if self.last_frame is not None:
+                interval.add(now - self.last_frame)
+            self.last_frame = now
+            frame()
+        game.animate_frame = frame_and_measure
+
+    def report(self):
+        ''' Return value: type: string - a table of the histograms, in
+                          milliseconds, and the counters
+        '''
+        lines = ["%-16s %8s %9s %9s %9s %9s"
+                 % ('timer', 'count', 'mean ms', 'p50 ms', 'p99 ms', 'max ms')]
+        for name in sorted(self.histograms):
+            histogram = self.histograms[name]
+            mean = histogram.total / histogram.count if histogram.count else 0.0
+            lines.append("%-16s %8d %9.3f %9.3f %9.3f %9.3f"
+                         % (name, histogram.count, mean * 1e3,
+                            histogram.percentile(50) * 1e3,
+                            histogram.percentile(99) * 1e3,
+                            histogram.max * 1e3))
+        for name in sorted(self.counters):
+            lines.append("%-16s %8d" % (name, self.counters[name]))
+        return '\n'.join(lines)
@@ -0,0 +1,263 @@
+import struct
+from bisect import bisect_right
+
+from tetris_core import Block, PieceSource, Point, Tetris
+
+############################################################
+# BINARY FORMAT
+############################################################
+#
+# A replay file is a header followed by a stream of events:
+#
+#   header: b'TTRP', version (uint8), board width and height (uint16),
+#           seed (uint64), piece policy (uint8, index in
+#           PieceSource.POLICIES; not in version 1 files, which are
+#           'uniform'), all little endian
+#   event:  varint (time since the previous event in ms << 3 | code)
+#
+# code is an index in EVENTS, or CHECKPOINT. A checkpoint event is
+# followed by a varint length and the checkpoint itself (see
+# encode_checkpoint); it holds the state of the game after all the
+# events before it.
+
+EVENTS = ['Left', 'Right', 'Down', 'Up', 'space', 'gravity']
+CHECKPOINT = 7
+
+MAGIC = b'TTRP'
+VERSION = 2
+HEADER = struct.Struct('<4sBHHQ')
+POLICY = struct.Struct('<B')
+CHECKPOINT_HEADER = struct.Struct('<IIIBBhhB')
+
+
+def write_varint(data, value):
+    ''' Parameters: data - type: bytearray
+                    value - type: int - not negative
+
+        appends value to data, 7 bits per byte, low bits first
+    '''
+    while value >= 0x80:
+        data.append((value & 0x7f) | 0x80)
+        value >>= 7
+    data.append(value)
+
+
+def read_varint(data, pos):
+    ''' Parameters: data - type: bytes
+                    pos - type: int
+        Return value: type: tuple - (value, position after it)
+    '''
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def encode_checkpoint(game, events):
+    ''' Parameters: game - type: Tetris
+                    events - type: int - the events played so far
+        Return value: type: bytes
+
+        packs the state of the game: the counters, the current shape
+        (kind, position of blocks[1], orientation) and one byte per
+        square of the board (0 if empty, color index + 1 otherwise).
+        The generator is not stored: it is the seed after pieces + 1 draws
+    '''
+    board = game.board
+    shape = game.current_shape
+    pivot = shape.blocks[1]
+    data = bytearray(CHECKPOINT_HEADER.pack(
+        events, game.pieces, game.lines, board.over,
+        Tetris.SHAPES.index(type(shape)), pivot.x, pivot.y, shape.orientation))
+
+    cells = bytearray(board.width * board.height)
+    for y, packed in enumerate(board.colors):
+        i = y * board.width
+        while packed:
+            cells[i] = packed & 7
+            packed >>= 3
+            i += 1
+    data += cells
+    return bytes(data)
+
+
+def decode_checkpoint(game, data):
+    ''' Parameters: game - type: Tetris - a new game with the right seed
+                    data - type: bytes - made by encode_checkpoint
+        Return value: type: int - the events played so far
+
+        puts the game in the state stored in data
+    '''
+    (events, pieces, lines, over, kind,
+     x, y, orientation) = CHECKPOINT_HEADER.unpack_from(data)
+
+    board = game.board
+    blocks = []
+    cells = data[CHECKPOINT_HEADER.size:]
+    for i in range(0, len(cells)):
+        if cells[i]:
+            blocks.append(Block(Point(i % board.width, i // board.width),
+                                cells[i] - 1))
+    board.add_blocks(blocks)
+    board.over = bool(over)
+
+    # a new game has taken its first shape, the checkpoint's game has
+    # also taken one per locked shape
+    game.source.skip(pieces)
+    game.pieces = pieces
+    game.lines = lines
+
+    game.current_shape = game.create_shape(kind, x, y, orientation)
+    return events
+
+
+############################################################
+# REPLAY LOG CLASS
+############################################################
+
+class ReplayLog():
+    ''' ReplayLog class: records a game while it is played
+        Attributes: data - type:bytearray - the replay file so far
+                    events - type:int - the number of events recorded
+                    last_time - type:int - the time of the last event, in ms
+                    interval - type:int - a checkpoint is stored every
+                    interval events, never if it is 0
+    '''
+
+    def __init__(self, game, interval=256):
+        if not 0 <= game.seed < (1 << 64):
+            raise ValueError("a replay needs a seed between 0 and 2**64 - 1")
+        self.data = bytearray(HEADER.pack(MAGIC, VERSION, game.board.width,
+                                          game.board.height, game.seed))
+        self.data += POLICY.pack(PieceSource.POLICIES.index(game.source.policy))
+        self.events = 0
+        self.last_time = 0
+        self.interval = interval
+
+    def record(self, event, time, game=None):
+        ''' Parameters: event - type: string - one of EVENTS
+                        time - type: int - ms since the game started
+                        game - type: Tetris - the game, after the event was
+                        played; needed to store checkpoints
+
+            appends the event to the log
+        '''
+        delta = max(0, int(time) - self.last_time)
+        self.last_time += delta
+        write_varint(self.data, (delta << 3) | EVENTS.index(event))
+        self.events += 1
+
+        if game is not None and self.interval and self.events % self.interval == 0:
+            checkpoint = encode_checkpoint(game, self.events)
+            write_varint(self.data, CHECKPOINT)
+            write_varint(self.data, len(checkpoint))
+            self.data += checkpoint
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.data)
+
+
+############################################################
+# REPLAY CLASS
+############################################################
+
+class Replay():
+    ''' Replay class: plays a recorded game again, without a window
+        and as fast as possible
+        Attributes: width, height - type:int - size of the board
+                    seed - type:int - the seed of the game
+                    policy - type:string - its piece policy, see PieceSource
+                    times - type:list - the time of each event, in ms
+                    events - type:list - the name of each event
+                    checkpoints - type:list - (events played, checkpoint data)
+                    in the order they were recorded
+    '''
+
+    def __init__(self, data):
+        magic, version, self.width, self.height, self.seed = HEADER.unpack_from(data)
+        if magic != MAGIC or not 1 <= version <= VERSION:
+            raise ValueError("not a tetris replay")
+        pos = HEADER.size
+        self.policy = 'uniform'
+        if version >= 2:
+            self.policy = PieceSource.POLICIES[POLICY.unpack_from(data, pos)[0]]
+            pos += POLICY.size
+
+        self.times = []
+        self.events = []
+        self.checkpoints = []
+        time = 0
+        while pos < len(data):
+            value, pos = read_varint(data, pos)
+            code = value & 7
+            if code == CHECKPOINT:
+                size, pos = read_varint(data, pos)
+                self.checkpoints.append((len(self.events), bytes(data[pos:pos + size])))
+                pos += size
+            else:
+                time += value >> 3
+                self.times.append(time)
+                self.events.append(EVENTS[code])
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def new_game(self, engine='bitboard'):
+        ''' Return value: type: Tetris
+
+            returns the game as it was before the first event, on a
+            board of the size it was recorded on and with its piece policy
+        '''
+        return Tetris(engine, self.seed, self.width, self.height, self.policy)
+
+    def play(self, game, start, stop):
+        ''' Parameters: game - type: Tetris - the game after start events
+                        start - type: int
+                        stop - type: int
+
+            plays events start to stop - 1 on the game
+        '''
+        for event in self.events[start:stop]:
+            if event == 'gravity':
+                event = 'Down'
+            game.do_move(event)
+
+    def seek(self, index, engine='bitboard'):
+        ''' Parameter: index - type: int - the number of events to play
+            Return value: type: Tetris
+
+            returns the game after the first index events, starting
+            from the last checkpoint before it
+        '''
+        game = self.new_game(engine)
+        start = 0
+        found = bisect_right([events for events, data in self.checkpoints], index)
+        if found:
+            start = decode_checkpoint(game, self.checkpoints[found - 1][1])
+        self.play(game, start, index)
+        return game
+
+    def index_at(self, time):
+        ''' Parameter: time - type: int - ms since the game started
+            Return value: type: int
+
+            returns the number of events played by that time
+        '''
+        return bisect_right(self.times, time)
+
+    def run(self, engine='bitboard'):
+        ''' Return value: type: Tetris
+
+            plays the whole game and returns it
+        '''
+        game = self.new_game(engine)
+        self.play(game, 0, len(self.events))
+        return game
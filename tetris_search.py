@@ -0,0 +1,258 @@
+from collections import OrderedDict, deque
+
+from tetris_core import Tetris
+
+############################################################
+# FIT MASKS
+############################################################
+
+def board_columns(board):
+    ''' Parameter: board - type: Board
+        Return value: type: list - one bitmask per column
+
+        returns the columns of the board as bitmasks, bit y of
+        column x set if square (x, y) is occupied
+    '''
+    columns = [0] * board.width
+    if board.bits is not None:
+        for y, row in enumerate(board.bits.rows):
+            while row:
+                low = row & -row
+                columns[low.bit_length() - 1] |= 1 << y
+                row ^= low
+    else:
+        for x, y in board.grid:
+            columns[x] |= 1 << y
+    return columns
+
+
+def fit_masks(board, shape_class):
+    ''' Parameters: board - type: Board
+                    shape_class - type: Shape subclass
+        Return value: type: list - fits[orientation][x]
+
+        returns, for each orientation of the shape and each column x of
+        blocks[1], a bitmask of the rows y where the shape fits on the
+        board, i.e. where Shape.can_move would return True
+    '''
+    height = board.height
+    all_rows = (1 << height) - 1
+    # squares below the board count as occupied
+    columns = [column | (-1 << height) for column in board_columns(board)]
+
+    fits = []
+    for offsets in shape_class.ROTATIONS:
+        per_x = []
+        for x in range(0, board.width):
+            taken = 0
+            for dx, dy in offsets:
+                if x + dx < 0 or x + dx >= board.width:
+                    taken = -1
+                    break
+                if dy >= 0:
+                    taken |= columns[x + dx] >> dy
+                else:
+                    # squares above the board count as occupied
+                    taken |= (columns[x + dx] << -dy) | ((1 << -dy) - 1)
+            per_x.append(~taken & all_rows)
+        fits.append(per_x)
+    return fits
+
+
+############################################################
+# PLACEMENT CLASS
+############################################################
+
+class Placement():
+    ''' Placement class: a square where the current shape can come to rest
+        Attributes: x - type: int
+                    y - type: int
+        the position of blocks[1] of the shape
+                    orientation - type: int - index in the shape's ROTATIONS
+                    cells - type: list - the (x, y) squares of the blocks
+                    keys - type: list - the shortest sequence of keys
+                    ('Left', 'Right', 'Up', 'Down') for Tetris.do_move
+                    that brings the shape there and locks it
+    '''
+
+    __slots__ = ('x', 'y', 'orientation', 'cells', 'keys')
+
+    def __init__(self, x, y, orientation, cells, keys):
+        self.x = x
+        self.y = y
+        self.orientation = orientation
+        self.cells = cells
+        self.keys = keys
+
+    def __repr__(self):
+        return 'Placement(%d, %d, %d, %r)' % (self.x, self.y,
+                                             self.orientation, self.keys)
+
+
+############################################################
+# TRANSPOSITION CACHE CLASS
+############################################################
+
+class TranspositionCache():
+    ''' TranspositionCache class: remembers results by the Zobrist hash
+        of the state they were computed for (Board.hash, or
+        Tetris.state_hash with the falling shape), forgetting the least
+        recently used ones first
+        Attributes: size - type: int - the most results it keeps
+                    entries - type: OrderedDict - hash -> result, least
+                    recently used first
+                    hits - type: int - lookups that found a result
+                    misses - type: int - lookups that did not
+    '''
+
+    def __init__(self, size=65536):
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        ''' Parameters: key - type: int
+                        default - the value to return if key is missing
+            Return value: the result stored for key, or default
+        '''
+        result = self.entries.get(key, self)
+        if result is self:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return result
+
+    def put(self, key, result):
+        ''' Parameters: key - type: int
+                        result - the value to store
+
+            stores the result, dropping the least recently used one
+            if the cache is full
+        '''
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def hit_rate(self):
+        ''' Return value: type: float - the share of lookups that hit
+        '''
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+        return self.hits / float(lookups)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+############################################################
+# PLACEMENT SEARCH
+############################################################
+
+def find_placements(board, shape, cache=None):
+    ''' Parameters: board - type: Board
+                    shape - type: Shape - the falling shape
+                    cache - type: TranspositionCache - results of earlier
+                    searches, keyed by the hash of the board and shape
+        Return value: type: list of Placement - shared with the cache,
+                      so not to be changed
+
+        returns every square where the shape can lock, with the
+        shortest key sequence to get there.
+
+        Breadth first search over the (x, y, orientation) states of the
+        shape, moving with the same rules as Tetris.do_move:
+        'Left'/'Right' and 'Up' move if the shape fits where it goes,
+        'Down' moves if the shape fits one and two squares lower and
+        otherwise locks it, one square lower if that square is free.
+        Placements that cover the same squares are only listed once.
+    '''
+    width = board.width
+    height = board.height
+    shape_class = type(shape)
+    pivot = shape.blocks[1]
+    if cache is not None:
+        kind = Tetris.SHAPES.index(shape_class)
+        cache_key = board.hash ^ board.pose_hash(kind, pivot.x, pivot.y,
+                                                 shape.orientation)
+        placements = cache.get(cache_key)
+        if placements is not None:
+            return placements
+
+    fits = fit_masks(board, shape_class)
+    turns = len(fits)
+
+    # a state (x, y, orientation) is numbered (orientation*width + x)*height + y;
+    # blocks[1] is one of the blocks, so it is always on the board
+    start = (shape.orientation*width + pivot.x)*height + pivot.y
+    parents = {start: None}
+    queue = deque([start])
+    resting = {}
+
+    while queue:
+        state = queue.popleft()
+        rest, y = divmod(state, height)
+        orientation, x = divmod(rest, width)
+        column = fits[orientation]
+
+        if x > 0 and (column[x - 1] >> y) & 1:
+            new = state - height
+            if new not in parents:
+                parents[new] = (state, 'Left')
+                queue.append(new)
+        if x < width - 1 and (column[x + 1] >> y) & 1:
+            new = state + height
+            if new not in parents:
+                parents[new] = (state, 'Right')
+                queue.append(new)
+        turned = (orientation + 1) % turns
+        if (fits[turned][x] >> y) & 1:
+            new = (turned*width + x)*height + y
+            if new not in parents:
+                parents[new] = (state, 'Up')
+                queue.append(new)
+
+        below = column[x] >> (y + 1)
+        if not below & 1:
+            end = state
+        elif not below & 2:
+            end = state + 1
+        else:
+            if state + 1 not in parents:
+                parents[state + 1] = (state, 'Down')
+                queue.append(state + 1)
+            continue
+
+        if end not in resting:
+            resting[end] = state
+
+    placements = []
+    seen = set()
+    for end, state in resting.items():
+        rest, y = divmod(end, height)
+        orientation, x = divmod(rest, width)
+        offsets = shape_class.ROTATIONS[orientation]
+        cells = [(x + dx, y + dy) for dx, dy in offsets]
+        squares = frozenset(cells)
+        if squares in seen:
+            continue
+        seen.add(squares)
+
+        keys = ['Down']
+        while parents[state] is not None:
+            state, key = parents[state]
+            keys.append(key)
+        keys.reverse()
+        placements.append(Placement(x, y, orientation, cells, keys))
+
+    if cache is not None:
+        cache.put(cache_key, placements)
+    return placements
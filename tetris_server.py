@@ -0,0 +1,417 @@
+import argparse
+import asyncio
+import heapq
+import random
+import struct
+
+from tetris_broadcast import Broadcaster
+from tetris_core import Tetris
+from tetris_metrics import Histogram
+from tetris_replay import EVENTS
+
+############################################################
+# PROTOCOL
+############################################################
+#
+# A client sends key names, one per line: Left, Right, Down, Up or space.
+# A spectator sends 'watch' and the number of a session instead, and gets
+# the frames of its Broadcaster (see tetris_broadcast.py).
+#
+# The server sends updates, each a uint32 length and that many bytes:
+#
+#   header: tick (uint32), lines (uint32), pieces (uint32), over (uint8),
+#           kind, x, y, orientation of the falling shape (uint8, int16,
+#           int16, uint8), number of cells (uint32)
+#   cells:  x (uint16), y (uint16), color (uint8, 0 if empty, color index + 1)
+#
+# all little endian. The cells are the squares of the board that changed
+# since the previous update; the first update holds every occupied square.
+#
+# Updates and frames are written without waiting for the client to read
+# them; a client that leaves more than MAX_BUFFER bytes unread is
+# disconnected. A spectator is disconnected when the session it watches
+# ends.
+
+KEYS = [event for event in EVENTS if event != 'gravity']
+UPDATE_HEADER = struct.Struct('<IIIBBhhBI')
+UPDATE_CELL = struct.Struct('<HHB')
+LENGTH = struct.Struct('<I')
+MAX_BUFFER = 1 << 20
+
+
+############################################################
+# CLIENT WRITER CLASS
+############################################################
+
+class ClientWriter():
+    ''' ClientWriter class: writes to a client without waiting for it,
+        and disconnects it once it falls behind
+        Attributes: writer - type: asyncio.StreamWriter
+                    limit - type: int - the most bytes the client may
+                    leave unread
+                    dropped - type: bool - True once it was disconnected
+    '''
+
+    def __init__(self, writer, limit=MAX_BUFFER):
+        self.writer = writer
+        self.limit = limit
+        self.dropped = False
+
+    def write(self, data):
+        if self.dropped:
+            return
+        transport = self.writer.transport
+        if transport.get_write_buffer_size() + len(data) > self.limit:
+            # dropping the buffer also wakes up the reads of the client
+            self.dropped = True
+            transport.abort()
+            return
+        self.writer.write(data)
+
+
+############################################################
+# SESSION CLASS
+############################################################
+
+class Session():
+    ''' Session class: a game played by one client
+        Attributes: game - type: Tetris
+                    writer - type: ClientWriter - to the client
+                    delay - type: float - seconds between two gravity moves
+                    sent - type: list - the packed colors of each row
+                    (see Board.colors) the client was last sent
+                    tick - type: int - the updates sent so far
+                    closed - type: bool - True once the client left
+                    ended - type: asyncio.Event - set once the client left
+                    broadcast - type: Broadcaster - sends the game to
+                    the spectators
+    '''
+
+    def __init__(self, game, writer, delay):
+        self.game = game
+        self.writer = writer
+        self.delay = delay
+        self.sent = [0] * game.board.height
+        self.tick = 0
+        self.closed = False
+        self.ended = asyncio.Event()
+        self.broadcast = Broadcaster(game)
+
+    def play(self, key):
+        ''' Parameter: key - type: string - one of KEYS, or 'Down' for gravity
+        '''
+        if not self.game.board.over:
+            self.game.do_move(key)
+            self.broadcast.publish()
+
+    def encode_update(self):
+        ''' Return value: type: bytes - the update for the client, with
+                          its length
+        '''
+        board = self.game.board
+        width = board.width
+        cells = bytearray()
+        count = 0
+        for y in range(0, board.height):
+            changed = board.colors[y] ^ self.sent[y]
+            if not changed:
+                continue
+            for x in range(0, width):
+                if (changed >> (3 * x)) & 7:
+                    color = (board.colors[y] >> (3 * x)) & 7
+                    cells += UPDATE_CELL.pack(x, y, color)
+                    count += 1
+            self.sent[y] = board.colors[y]
+
+        shape = self.game.current_shape
+        pivot = shape.blocks[1]
+        header = UPDATE_HEADER.pack(self.tick, self.game.lines, self.game.pieces,
+                                    board.over, Tetris.SHAPES.index(type(shape)),
+                                    pivot.x, pivot.y, shape.orientation, count)
+        self.tick += 1
+        return LENGTH.pack(len(header) + len(cells)) + header + bytes(cells)
+
+    def send_update(self):
+        if not self.closed:
+            self.writer.write(self.encode_update())
+
+    def close(self):
+        self.closed = True
+        self.ended.set()
+
+
+############################################################
+# GRAVITY SCHEDULER CLASS
+############################################################
+
+class GravityScheduler():
+    ''' GravityScheduler class: moves the shapes of every session down,
+        each at its own delay, from one task
+        Attributes: queue - type:list - heap of (due time, number, session)
+                    lateness - type:Histogram - how late each move was
+                    wake - type:asyncio.Event - set when a session is added
+                    moves - type:int - the gravity moves so far
+
+        A session's moves are due at start + k*delay, so a late move
+        does not delay the next ones; a session more than one delay
+        behind skips the moves it missed. A game that is over gets no
+        more moves.
+    '''
+
+    def __init__(self):
+        self.queue = []
+        self.count = 0
+        self.lateness = Histogram()
+        self.wake = asyncio.Event()
+        self.moves = 0
+
+    def add(self, session, now):
+        self.count += 1
+        heapq.heappush(self.queue, (now + session.delay, self.count, session))
+        self.wake.set()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self.wake.clear()
+            if not self.queue:
+                await self.wake.wait()
+                continue
+            wait = self.queue[0][0] - loop.time()
+            if wait > 0:
+                try:
+                    await asyncio.wait_for(self.wake.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            now = loop.time()
+            while self.queue and self.queue[0][0] <= now:
+                due, number, session = heapq.heappop(self.queue)
+                if session.closed:
+                    continue
+                self.lateness.add(now - due)
+                session.play('Down')
+                session.send_update()
+                self.moves += 1
+                if session.game.board.over:
+                    continue
+
+                due += session.delay
+                if due <= now:
+                    due += (int((now - due) / session.delay) + 1) * session.delay
+                heapq.heappush(self.queue, (due, number, session))
+
+
+############################################################
+# SERVER CLASS
+############################################################
+
+class TetrisServer():
+    ''' TetrisServer class: hosts a game for each client on one event loop
+        Attributes: delay - type:float - seconds between two gravity moves
+                    scheduler - type:GravityScheduler
+                    sessions - type:Dictionary - number -> the session of
+                    each connected client
+                    count - type:int - the sessions started so far
+                    rng - type:Random - draws the seeds of the games
+    '''
+
+    def __init__(self, delay=1.0, seed=None):
+        self.delay = delay
+        self.scheduler = None
+        self.scheduler_task = None
+        self.sessions = {}
+        self.count = 0
+        self.rng = random.Random(seed)
+
+    async def serve(self, host='127.0.0.1', port=0, path=None):
+        ''' Parameters: host, port - where to listen for TCP clients
+                        path - type: string - a Unix socket to listen on
+                        instead
+            Return value: type: asyncio.Server - already listening
+        '''
+        self.scheduler = GravityScheduler()
+        self.scheduler_task = asyncio.ensure_future(self.scheduler.run())
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle_client, path)
+        return await asyncio.start_server(self.handle_client, host, port)
+
+    async def handle_client(self, reader, writer):
+        try:
+            line = await reader.readline()
+            words = line.split()
+            if len(words) == 2 and words[0] == b'watch' and words[1].isdigit():
+                await self.watch(int(words[1]), reader, writer)
+            else:
+                await self.play(line, reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def play(self, line, reader, writer):
+        ''' Parameters: line - type: bytes - the first line the client sent
+                        reader, writer - the connection
+
+            plays a new game with the keys the client sends
+        '''
+        game = Tetris(seed=self.rng.getrandbits(32))
+        session = Session(game, ClientWriter(writer), self.delay)
+        number = self.count
+        self.count += 1
+        self.sessions[number] = session
+        session.send_update()
+        self.scheduler.add(session, asyncio.get_running_loop().time())
+        try:
+            while line:
+                key = line.strip().decode('ascii', 'replace')
+                if key in KEYS:
+                    session.play(key)
+                    session.send_update()
+                await writer.drain()
+                line = await reader.readline()
+        finally:
+            session.close()
+            del self.sessions[number]
+
+    async def watch(self, number, reader, writer):
+        ''' Parameters: number - type: int - the session to watch
+                        reader, writer - the connection of the spectator
+
+            sends the frames of the session until the spectator leaves
+            or the session ends
+        '''
+        session = self.sessions.get(number)
+        if session is None:
+            return
+        subscriber = ClientWriter(writer)
+        session.broadcast.subscribe(subscriber)
+        ended = asyncio.ensure_future(session.ended.wait())
+        read = None
+        try:
+            while True:
+                read = asyncio.ensure_future(reader.read(1024))
+                await asyncio.wait([read, ended], return_when=asyncio.FIRST_COMPLETED)
+                if ended.done() or not read.done() or not read.result():
+                    break
+        finally:
+            for task in (read, ended):
+                if task is not None and not task.done():
+                    task.cancel()
+            session.broadcast.unsubscribe(subscriber)
+
+    def close(self):
+        if self.scheduler_task is not None:
+            self.scheduler_task.cancel()
+
+
+############################################################
+# LOAD TEST
+############################################################
+
+async def read_updates(reader):
+    ''' reads and drops updates until the server closes the connection
+    '''
+    try:
+        while True:
+            size = LENGTH.unpack(await reader.readexactly(LENGTH.size))[0]
+            await reader.readexactly(size)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+
+
+async def load_client(connect, rate, stop):
+    ''' a client that presses a random key rate times a second until stop
+    '''
+    reader, writer = await connect()
+    task = asyncio.ensure_future(read_updates(reader))
+    rng = random.Random()
+    try:
+        while not stop.is_set():
+            writer.write((rng.choice(KEYS[:4]) + '\n').encode('ascii'))
+            await writer.drain()
+            await asyncio.sleep(rng.expovariate(rate))
+    finally:
+        writer.close()
+        task.cancel()
+
+
+async def load_step(sessions, duration, delay, rate):
+    ''' Return value: type: Histogram - the lateness of the gravity moves
+                      with sessions clients for duration seconds
+    '''
+    server = TetrisServer(delay)
+    listener = await server.serve()
+    port = listener.sockets[0].getsockname()[1]
+    stop = asyncio.Event()
+
+    def connect():
+        return asyncio.open_connection('127.0.0.1', port)
+    clients = [asyncio.ensure_future(load_client(connect, rate, stop))
+               for i in range(0, sessions)]
+    await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.gather(*clients, return_exceptions=True)
+    listener.close()
+    server.close()
+    return server.scheduler.lateness
+
+
+def load_test(target=0.010, duration=5.0, delay=0.05, rate=10.0, start=50,
+              limit=5000):
+    ''' Parameters: target - type: float - the p99 lateness of gravity
+                    moves to stay under, in seconds
+                    duration - type: float - seconds per step
+                    delay - type: float - gravity delay of the games
+                    rate - type: float - keys per second per client
+                    start, limit - type: int - sessions of the first step
+                    and the most tried
+        Return value: type: int - the most sessions one process (one core)
+                      served under the target
+
+        doubles the number of sessions until the p99 lateness goes over
+        the target. The clients run in the same process, so the result
+        is a lower bound
+    '''
+    best = 0
+    sessions = start
+    while sessions <= limit:
+        lateness = asyncio.run(load_step(sessions, duration, delay, rate))
+        p99 = lateness.percentile(99)
+        print("%5d sessions: %7d moves, lateness p50 %.2f ms, p99 %.2f ms, max %.2f ms"
+              % (sessions, lateness.count, lateness.percentile(50) * 1e3,
+                 p99 * 1e3, lateness.max * 1e3))
+        if p99 > target:
+            break
+        best = sessions
+        sessions *= 2
+    print("%d sessions per core at p99 lateness under %.1f ms" % (best, target * 1e3))
+    return best
+
+
+################################################################
+# Run the server
+################################################################
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="host Tetris games")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7007)
+    parser.add_argument('--unix', help="listen on this Unix socket instead")
+    parser.add_argument('--delay', type=float, default=1.0,
+                        help="seconds between two gravity moves")
+    parser.add_argument('--load-test', action='store_true')
+    parser.add_argument('--target', type=float, default=10.0,
+                        help="p99 gravity lateness for --load-test, in ms")
+    args = parser.parse_args()
+
+    if args.load_test:
+        load_test(args.target / 1000.0)
+    else:
+        async def main():
+            server = TetrisServer(args.delay)
+            listener = await server.serve(args.host, args.port, args.unix)
+            async with listener:
+                await listener.serve_forever()
+        asyncio.run(main())
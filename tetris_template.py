@@ -1,725 +1,295 @@
+import os
+import sys
+import time
+
 from graphics import *
-from random import *
+from tetris_core import COLORS, Tetris
+from tetris_loop import FixedStep, InputQueue
+from tetris_metrics import Metrics
+from tetris_replay import EVENTS, ReplayLog
 
 ############################################################
-# BLOCK CLASS
+# BOARD VIEW CLASS
 ############################################################
 
-class Block(Rectangle):
-    ''' Block class:
-        Implement a block for a tetris piece
-        Attributes: x - type: int
-                    y - type: int
-        specify the position on the tetris board
-        in terms of the square grid
+class BoardView():
+    ''' BoardView class: draws a Tetris game on a CanvasFrame
+
+        Attributes: canvas - type:CanvasFrame - where the pieces will be drawn
+                    width, height - type:int - size of the board in squares
+                    columns, rows - type:int - size of the viewport, the
+                    part of the board that is drawn, at most VIEW_SQUARES
+                    squares each way
+                    left, top - type:int - the board square drawn in the
+                    top left corner, None before the first render
+                    cells - type:list - one Rectangle per square of the
+                    viewport, row by row, created once and only refilled
+                    colors - type:list - the color index each cell is
+                    filled with, None for an empty square
+                    ghost - type:list - the Rectangles outlining where the
+                    falling shape would land, drawn over the cells
+                    piece - type:list - the Rectangles of the falling shape,
+                    drawn over the ghost
+                    drawn - type:Dictionary - for each Rectangle of ghost
+                    and piece, the square of the viewport and color index
+                    it is drawn with
+                    shown_game_over - type:bool - whether the game over
+                    message was displayed
+
+        A board larger than the viewport scrolls to keep the falling
+        shape at least MARGIN squares from the edges of the viewport.
+        Only the squares of the viewport have Rectangles, so the cost of
+        a frame does not grow with the size of the board.
     '''
 
     BLOCK_SIZE = 30
     OUTLINE_WIDTH = 3
+    BACKGROUND = 'light gray'
+    VIEW_SQUARES = 32
+    MARGIN = 4
 
-    def __init__(self, pos, color):
-        self.x = pos.x
-        self.y = pos.y
-        
-        p1 = Point(pos.x*Block.BLOCK_SIZE + Block.OUTLINE_WIDTH,
-                   pos.y*Block.BLOCK_SIZE + Block.OUTLINE_WIDTH)
-        p2 = Point(p1.x + Block.BLOCK_SIZE, p1.y + Block.BLOCK_SIZE)
-
-        Rectangle.__init__(self, p1, p2)
-        self.setWidth(Block.OUTLINE_WIDTH)
-        self.setFill(color)
-
-    def can_move(self, board, dx, dy):
-        ''' Parameters: dx - type: int
-                        dy - type: int
-
-            Return value: type: bool
-                        
-            checks if the block can move dx squares in the x direction
-            and dy squares in the y direction
-            Returns True if it can, and False otherwise
-            HINT: use the can_move method on the Board object
-        '''
-
-        DIRECTION_DOWN = dx == 0 and dy == 1
-
-        OUT_OF_BOUNDS = (self.x + dx) > board.width or (self.x + dx) < 0 or (self.y + dy) > board.height - 1 or (self.y + dy) < 0
-        if OUT_OF_BOUNDS or not board.can_move(self.x + dx, self.y + dy):
-            return False
-        else:
-            return True
-    
-    def move(self, dx, dy):
-        ''' Parameters: dx - type: int
-                        dy - type: int
-                        
-            moves the block dx squares in the x direction
-            and dy squares in the y direction
-        '''
-
-        self.x += dx
-        self.y += dy
-
-        Rectangle.move(self, dx*Block.BLOCK_SIZE, dy*Block.BLOCK_SIZE)
-
-############################################################
-# SHAPE CLASS
-############################################################
-
-class Shape():
-    ''' Shape class:
-        Base class for all the tetris shapes
-        Attributes: blocks - type: list - the list of blocks making up the shape
-                    rotation_dir - type: int - the current rotation direction of the shape
-                    shift_rotation_dir - type: Boolean - whether or not the shape rotates
-    '''
-
-    def __init__(self, coords, color):
-        self.blocks = []
-        self.rotation_dir = 1
-        ### A boolean to indicate if a shape shifts rotation direction or not.
-        ### Defaults to false since only 3 shapes shift rotation directions (I, S and Z)
-        self.shift_rotation_dir = False
-        
-        for pos in coords:
-            self.blocks.append(Block(pos, color))
-
-
-
-    def get_blocks(self):
-        '''returns the list of blocks
-        '''
-        #YOUR CODE HERE
-        return self.blocks
-
-    def draw(self, win):
-        ''' Parameter: win - type: CanvasFrame
-
-            Draws the shape:
-            i.e. draws each block
-        ''' 
-        for block in self.blocks:
-            block.draw(win)
-
-    def move(self, dx, dy):
-        ''' Parameters: dx - type: int
-                        dy - type: int
-
-            moves the shape dx squares in the x direction
-            and dy squares in the y direction, i.e.
-            moves each of the blocks
-        '''
-        for block in self.blocks:
-            block.move(dx, dy)
-
-    def can_move(self, board, dx, dy):
-        ''' Parameters: dx - type: int
-                        dy - type: int
-
-            Return value: type: bool
-                        
-            checks if the shape can move dx squares in the x direction
-            and dy squares in the y direction, i.e.
-            check if each of the blocks can move
-            Returns True if all of them can, and False otherwise
-           
-        '''
-        
-        #YOUR CODE HERE
-        for block in self.blocks:
-            if not block.can_move(board,dx,dy):
-                return False
-
-        return True
-    
-    def get_rotation_dir(self):
-        ''' Return value: type: int
-        
-            returns the current rotation direction
-        '''
-        return self.rotation_dir
-
-    def get_rotate_positions(self, board):
-
-        direction = self.get_rotation_dir() # -1 is counterclockwise, 1 is clockwise
-        new_blocks = [] #will hold new blocks
-        temp_blocks = list(self.blocks) #a temporary copy of self.blocks, excluding the center piece at index 1
-
-        center_point = temp_blocks.pop(1)
-
-         #(x,y) is the center of revolution
-        x = center_point.x
-        y = center_point.y
-
-        #grid of eight points surrounding a center block, starting from the top left and going clockwise
-        moving_grid = [Point(x,y),
-                       Point(x-1, y-1),
-                       Point(x, y-1),
-                       Point(x+1, y-1),
-                       Point(x+1, y),
-                       Point(x+1, y+1),
-                       Point(x, y+1),
-                       Point(x-1, y+1),
-                       Point(x-1, y)]
-
-        
-        for point in temp_blocks:
-            for index in range(1, len(moving_grid)):
-                newind = None
-                #find point in grid that corresponds to point in blocks, excludes index 0 (center of grid)
-                if point.x == moving_grid[index].getX() and point.y == moving_grid[index].getY():
-                    if direction == -1: #counterclockwise
-                        newind = index - 2 #two spots up or down, depending on direction, in the matrix
-                    else: #presumably clockwise, assuming so in any case
-                        newind = index + 2
-
-                #wraps newind
-                if newind == -1:
-                    newind = len(moving_grid) - 2
-                elif newind == 0:
-                    newind = len(moving_grid) - 1
-                elif newind == len(moving_grid):
-                    newind = 1
-                elif newind == len(moving_grid) + 1:
-                    newind = 2
-
-
-                if not newind == None:
-                    new_blocks.append(moving_grid[newind])
-                    break
-
-        new_blocks.insert(1,moving_grid[0])
-
-        return new_blocks
-
-
-    def can_rotate(self, board):
-        ''' Parameters: board - type: Board object
-            Return value: type : bool
-            
-            Checks if the shape can be rotated.
-            
-            1. Get the rotation direction using the get_rotation_dir method
-            2. Compute the position of each block after rotation and check if
-            the new position is valid
-            3. If any of the blocks cannot be moved to their new position,
-            return False
-                        
-            otherwise all is good, return True
-        '''
-        
-        #YOUR CODE HERE
-        
-        new_blocks = self.get_rotate_positions(board) #this is in points
-
-        for block in new_blocks:
-            #check if spot trying to move to is occupied by the same shape
-            #if not, then try the board canmove method
-            if not board.can_move(block.getX(), block.getY()):
-
-                IS_OCCUPIED = False
-
-                for est in self.blocks:
-                    if block.getX() == est.x and block.getY() == est.y:
-                        IS_OCCUPIED = True
-
-                if not IS_OCCUPIED: # if not occupied already by the same shape and still cannot move there
-                    return False
-
-        return True
-
-
-
-
-    def rotate(self, board):
-        ''' Parameters: board - type: Board object
-
-            rotates the shape:
-            1. Get the rotation direction using the get_rotation_dir method
-            2. Compute the position of each block after rotation
-            3. Move the block to the new position
-            
-        '''    
-
-        ####  YOUR CODE HERE #####
-        rotated_blocks = self.get_rotate_positions(board)
-
-        for index in range(0, len(rotated_blocks)):
-            x = self.blocks[index].x
-            y = self.blocks[index].y  #old positions x and y, find in board and change
-            xnew = rotated_blocks[index].getX()
-            ynew = rotated_blocks[index].getY()
-
-            self.blocks[index].move(xnew-x, ynew-y)
-
-
-        ### This should be at the END of your rotate code. 
-        ### DO NOT touch it. Default behavior is that a piece will only shift
-        ### rotation direciton after a successful rotation. This ensures that 
-        ### pieces which switch rotations definitely remain within their 
-        ### accepted rotation positions.
-        if self.shift_rotation_dir:
-            self.rotation_dir *= -1
-
-        
-
-############################################################
-# ALL SHAPE CLASSES
-############################################################
-
- 
-class I_shape(Shape):
-    def __init__(self, center):
-        coords = [Point(center.x - 2, center.y),
-                  Point(center.x - 1, center.y),
-                  Point(center.x    , center.y),
-                  Point(center.x + 1, center.y)]
-        Shape.__init__(self, coords, 'blue')
-        self.shift_rotation_dir = True
-        self.center_block = self.blocks[2]
-
-    def get_rotate_positions(self, board):
-        #Overriding get_rotate positions because the I_shape doesn't work with the 9-grid scheme
-
-        direction = self.get_rotation_dir() # -1 is counterclockwise, 1 is clockwise
-        new_blocks = [] #will hold new blocks
-        temp_blocks = list(self.blocks) #a temporary copy of self.blocks, excluding the center piece at index 1
-
-        center_point = temp_blocks.pop(1)
-
-         #(x,y) is the center of revolution
-        x = center_point.x
-        y = center_point.y
-
-        
-        for point in temp_blocks:
-            if point.y == y: #y is equal to the center
-                dx = (point.x - x)*direction
-                new_blocks.append(Point(x, y + dx))
-            elif point.x == x: #x is equal to center
-                dy = (point.y - y)*direction #accounts for clockwise or counterclockwise
-                new_blocks.append(Point(x + dy, y))
-
-        new_blocks.insert(1,Point(x,y))
-
-        return new_blocks
-
-
-class J_shape(Shape):
-    def __init__(self, center):
-        coords = [Point(center.x - 1, center.y),
-                  Point(center.x    , center.y),
-                  Point(center.x + 1, center.y),
-                  Point(center.x + 1, center.y + 1)]
-        Shape.__init__(self, coords, 'orange')        
-        self.center_block = self.blocks[1]
-
-class L_shape(Shape):
-    def __init__(self, center):
-        coords = [Point(center.x - 1, center.y),
-                  Point(center.x    , center.y),
-                  Point(center.x + 1, center.y),
-                  Point(center.x - 1, center.y + 1)]
-        Shape.__init__(self, coords, 'cyan')        
-        self.center_block = self.blocks[1]
-
-
-class O_shape(Shape):
-    def __init__(self, center):
-        coords = [Point(center.x    , center.y),
-                  Point(center.x - 1, center.y),
-                  Point(center.x   , center.y + 1),
-                  Point(center.x - 1, center.y + 1)]
-        Shape.__init__(self, coords, 'red')
-        self.center_block = self.blocks[0]
-
-    def rotate(self, board):
-        # Override Shape's rotate method since O_Shape does not rotate
-        return 
-
-class S_shape(Shape):
-    def __init__(self, center):
-        coords = [Point(center.x    , center.y),
-                  Point(center.x    , center.y + 1),
-                  Point(center.x + 1, center.y),
-                  Point(center.x - 1, center.y + 1)]
-        Shape.__init__(self, coords, 'green')
-        self.center_block = self.blocks[0]
-        self.shift_rotation_dir = True
-        self.rotation_dir = -1
-
-
-class T_shape(Shape):
-    def __init__(self, center):
-        coords = [Point(center.x - 1, center.y),
-                  Point(center.x    , center.y),
-                  Point(center.x + 1, center.y),
-                  Point(center.x    , center.y + 1)]
-        Shape.__init__(self, coords, 'yellow')
-        self.center_block = self.blocks[1]
-
-
-class Z_shape(Shape):
-    def __init__(self, center):
-        coords = [Point(center.x - 1, center.y),
-                  Point(center.x    , center.y), 
-                  Point(center.x    , center.y + 1),
-                  Point(center.x + 1, center.y + 1)]
-        Shape.__init__(self, coords, 'magenta')
-        self.center_block = self.blocks[1]
-        self.shift_rotation_dir = True
-        self.rotation_dir = -1      
-
-
-
-############################################################
-# BOARD CLASS
-############################################################
-
-class Board():
-    ''' Board class: it represents the Tetris board
-
-        Attributes: width - type:int - width of the board in squares
-                    height - type:int - height of the board in squares
-                    canvas - type:CanvasFrame - where the pieces will be drawn
-                    grid - type:Dictionary - keeps track of the current state of
-                    the board; stores the blocks for a given position
-    '''
-    
     def __init__(self, win, width, height):
         self.width = width
         self.height = height
+        self.columns = min(width, BoardView.VIEW_SQUARES)
+        self.rows = min(height, BoardView.VIEW_SQUARES)
+        self.left = None
+        self.top = None
 
         # create a canvas to draw the tetris shapes on
-        self.canvas = CanvasFrame(win, self.width * Block.BLOCK_SIZE,
-                                        self.height * Block.BLOCK_SIZE)
-        self.canvas.setBackground('light gray')
-
-        # create an empty dictionary
-        # currently we have no shapes on the board
-        self.grid = {}
-
-    def draw_shape(self, shape):
-        ''' Parameters: shape - type: Shape
-            Return value: type: bool
-
-            draws the shape on the board if there is space for it
-            and returns True, otherwise it returns False
+        self.canvas = CanvasFrame(win, self.columns * BoardView.BLOCK_SIZE,
+                                       self.rows * BoardView.BLOCK_SIZE)
+        self.canvas.setBackground(BoardView.BACKGROUND)
+
+        self.cells = []
+        for y in range(0, self.rows):
+            for x in range(0, self.columns):
+                rect = self.create_rect(x, y)
+                self.fill(rect, None)
+                self.cells.append(rect)
+        self.colors = [None] * (self.columns * self.rows)
+
+        # created after the cells so they are drawn on top
+        self.ghost = [self.create_rect(0, 0) for i in range(0, 4)]
+        self.piece = [self.create_rect(0, 0) for i in range(0, 4)]
+        self.drawn = {}
+        for rect in self.ghost + self.piece:
+            self.drawn[rect] = (0, 0, None)
+
+        self.shown_game_over = False
+
+    def create_rect(self, x, y):
+        ''' Parameters: x - type: int
+                        y - type: int
+            Return value: type: Rectangle
+
+            draws a new Rectangle on square x,y
         '''
-        if shape.can_move(self, 0, 0):
-            shape.draw(self.canvas)
-            return True
-        return False
-
-    def can_move(self, x, y):
-        ''' Parameters: x - type:int
-                        y - type:int
-            Return value: type: bool
-
-            1. check if it is ok to move to square x,y
-            if the position is outside of the board boundaries, can't move there
-            return False
-
-            2. if there is already a block at that postion, can't move there
-            return False
-
-            3. otherwise return True
-            
+        p1 = Point(x*BoardView.BLOCK_SIZE + BoardView.OUTLINE_WIDTH,
+                   y*BoardView.BLOCK_SIZE + BoardView.OUTLINE_WIDTH)
+        p2 = Point(p1.x + BoardView.BLOCK_SIZE, p1.y + BoardView.BLOCK_SIZE)
+
+        rect = Rectangle(p1, p2)
+        rect.setWidth(BoardView.OUTLINE_WIDTH)
+        rect.draw(self.canvas)
+        return rect
+
+    def fill(self, rect, color, ghost=False):
+        ''' Parameters: rect - type: Rectangle
+                        color - type: int - index in COLORS, None for empty
+                        ghost - type: bool - only outline rect with the color
+
+            fills rect with the color, an empty square blends
+            into the background
         '''
+        if color is None:
+            rect.setFill(BoardView.BACKGROUND)
+            rect.setOutline(BoardView.BACKGROUND)
+        elif ghost:
+            rect.setFill(BoardView.BACKGROUND)
+            rect.setOutline(COLORS[color])
+        else:
+            rect.setFill(COLORS[color])
+            rect.setOutline('black')
 
-        # false if out of bounds or already a block at that key 
-        OUT_OF_BOUNDS = x < 0 or x > self.width-1 or y < 0 or y > self.height-1   
-        if OUT_OF_BOUNDS or self.grid.has_key((x,y)):
-            return False
-
-        return True
+    def move(self, rect, dx, dy):
+        ''' Parameters: rect - type: Rectangle
+                        dx, dy - type: int - in squares
+        '''
+        rect.move(dx*BoardView.BLOCK_SIZE, dy*BoardView.BLOCK_SIZE)
 
-    def add_shape(self, shape):
-        ''' Parameter: shape - type:Shape
-            
-            add a shape to the grid, i.e.
-            add each block to the grid using its
-            (x, y) coordinates as a dictionary key
+    def place(self, rects, positions, color, ghost=False):
+        ''' Parameters: rects - type: list of Rectangle - ghost or piece
+                        positions - type: list of (x, y) tuples
+                        color - type: int - index in COLORS
+                        ghost - type: bool
 
-            Hint: use the get_blocks method on Shape to
-            get the list of blocks
-            
-        '''
-        
-        blocks = shape.get_blocks()
-        for block in blocks:
-            self.grid[(block.x,block.y)] = block        
-
-
-    def delete_row(self, y):
-        ''' Parameters: y - type:int
-
-            remove all the blocks in row y
-            to remove a block you must remove it from the grid
-            and erase it from the screen.
-            If you dont remember how to erase a graphics object
-            from the screen, take a look at the Graphics Library
-            handout
-            
-        '''
-        
-        #YOUR CODE HERE
-        for x in range(0,self.width):
-            if self.grid.has_key((x,y)):
-                self.grid[(x,y)].undraw()
-                self.grid.pop((x,y))
-    
-    def is_row_complete(self, y):        
-        ''' Parameter: y - type: int
-            Return value: type: bool
-
-            for each block in row y
-            check if there is a block in the grid (use the in operator) 
-            if there is one square that is not occupied, return False
-            otherwise return True
-            
+            moves each Rectangle to its square and refills it if
+            the color changed
         '''
-        
-        #YOUR CODE HERE
-        for x in range(0, self.width):
-            if not self.grid.has_key((x,y)): #if doesn't have that key, there is no block there
-                return False
-        return True
-    
-    def move_down_rows(self, y_start):
-        ''' Parameters: y_start - type:int                        
-
-            for each row from y_start to the top
-                for each column
-                    check if there is a block in the grid
-                    if there is, remove it from the grid
-                    and move the block object down on the screen
-                    and then place it back in the grid in the new position
-
+        for rect, (x, y) in zip(rects, positions):
+            old_x, old_y, old_color = self.drawn[rect]
+            if old_x != x or old_y != y:
+                self.move(rect, x - old_x, y - old_y)
+            if old_color != color:
+                self.fill(rect, color, ghost)
+            self.drawn[rect] = (x, y, color)
+
+    def follow(self, origin, position, size, limit):
+        ''' Parameters: origin - type: int - left or top, None at first
+                        position - type: int - the column or row of the
+                        falling shape
+                        size - type: int - columns or rows
+                        limit - type: int - width or height of the board
+            Return value: type: int - the new left or top, which keeps
+                          position MARGIN squares inside the viewport
+                          and the viewport on the board
         '''
-        #print "y_start is ", y_start
-        #print "height is ", self.height
-        #print "k range is ", range(1,y_start)
-        for k in range(0, y_start):
-            y = y_start - k
-            for x in range(0, self.width):
-                if self.grid.has_key((x,y)):
-                    #print "(x,y) is", (x,y)
-                    block = self.grid.pop((x,y)) #removed and saved
-                    block.move(0, 1)
-                    self.grid[(x,y+1)] = block
-                    #print "(x,y+1) is", (x,y+1)
-        
-        
-    
-    def remove_complete_rows(self):
-        ''' removes all the complete rows
-            1. for each row, y, 
-            2. check if the row is complete
-                if it is,
-                    delete the row
-                    move all rows down starting at row y - 1
-
+        if origin is None:
+            origin = position - size // 2
+        elif position < origin + BoardView.MARGIN:
+            origin = position - BoardView.MARGIN
+        elif position >= origin + size - BoardView.MARGIN:
+            origin = position - size + BoardView.MARGIN + 1
+        return max(0, min(origin, limit - size))
+
+    def render(self, game):
+        ''' Parameter: game - type: Tetris
+
+            brings the canvas up to date with the game:
+            1. scroll the viewport to follow the current shape
+            2. for each row of the viewport the board changed since the
+               last frame, every row if the viewport scrolled, refill
+               the cells whose color changed
+            3. move the ghost Rectangles to where the current shape
+               would land and the piece Rectangles to the current shape,
+               refilling them if the shape changed color. Squares outside
+               the viewport are moved off the canvas
         '''
-
-        r = 1
-        while r < self.height:
-            y = self.height - r
-            if self.is_row_complete(y):
-                #print "row is complete for row ", y
-                self.delete_row(y)
-                #print "moving down rows"
-                self.move_down_rows(y-1)
-                r = r - 1
-            r = r + 1
+        board = game.board
+        pivot = game.current_shape.blocks[1]
+        left = self.follow(self.left, pivot.x, self.columns, self.width)
+        top = self.follow(self.top, pivot.y, self.rows, self.height)
+        if left != self.left or top != self.top:
+            self.left = left
+            self.top = top
+            rows = range(top, top + self.rows)
+        else:
+            rows = [y for y in board.dirty_rows if top <= y < top + self.rows]
+        board.dirty_rows.clear()
+
+        for y in rows:
+            i = (y - top) * self.columns - left
+            packed = board.colors[y]
+            for x in range(left, left + self.columns):
+                color = ((packed >> (3 * x)) & 7) - 1
+                if color < 0:
+                    color = None
+                if self.colors[i + x] != color:
+                    self.colors[i + x] = color
+                    self.fill(self.cells[i + x], color)
+
+        blocks = game.current_shape.get_blocks()
+        color = blocks[0].color
+        self.place(self.ghost, [(x - left, y - top) for x, y in game.get_landing_positions()],
+                   color, True)
+        self.place(self.piece, [(block.x - left, block.y - top) for block in blocks], color)
+
+        if game.board.over and not self.shown_game_over:
+            self.game_over()
 
     def game_over(self):
-        ''' display "Game Over !!!" message in the center of the board
-            HINT: use the Text class from the graphics library
+        ''' display "Game Over" message
         '''
-        
-        #YOUR CODE HERE
-        print "Game Over"        
+        self.shown_game_over = True
+        print("Game Over")
 
 
 ############################################################
-# TETRIS CLASS
+# TETRIS WINDOW CLASS
 ############################################################
 
-class Tetris():
-    ''' Tetris class: Controls the game play
+class TkTetris(Tetris):
+    ''' TkTetris class: plays a Tetris game in a window
     Attributes:
-    SHAPES - type: list (list of Shape classes)
-    DIRECTION - type: dictionary - converts string direction to (dx, dy)
-    BOARD_WIDTH - type:int - the width of the board
-    BOARD_HEIGHT - type:int - the height of the board
-    board - type:Board - the tetris board
     win - type:Window - the window for the tetris game
+    view - type:BoardView - draws the game
     delay - type:int - the speed in milliseconds for moving the shapes
-    current_shapes - type: Shape - the current moving shape on the board
+    log - type:ReplayLog - records the seed and every move of the game
+    start_time - type:float - when the game started, in seconds
+    inputs - type:InputQueue - the keys pressed since the last frame
+    gravity - type:FixedStep - ticks every delay milliseconds
+    frames - type:FixedStep - ticks every FRAME milliseconds
+    FRAME - type:int - milliseconds between two frames
+    metrics - type:Metrics - measures the game, None if it is not measured
+
+    The board is BOARD_WIDTH x BOARD_HEIGHT squares unless width and height
+    are given; a board larger than the window scrolls (see BoardView).
     '''
 
-    SHAPES = [I_shape, J_shape, L_shape, O_shape, S_shape, T_shape, Z_shape]
-    DIRECTION = {'Left':(-1, 0), 'Right':(1, 0), 'Down':(0, 1)}
-    BOARD_WIDTH = 10
-    BOARD_HEIGHT = 20
-    
-    def __init__(self, win):
-        self.board = Board(win, self.BOARD_WIDTH, self.BOARD_HEIGHT)
+    FRAME = 16
+
+    def __init__(self, win, seed=None, metrics=None, width=None, height=None):
+        Tetris.__init__(self, seed=seed, width=width, height=height)
         self.win = win
+        self.log = ReplayLog(self)
+        self.view = BoardView(win, self.board.width, self.board.height)
         self.delay = 1000 #ms
 
+        self.inputs = InputQueue()
+        self.start_time = time.monotonic()
+        self.gravity = FixedStep(self.delay / 1000.0, self.start_time)
+        self.frames = FixedStep(self.FRAME / 1000.0, self.start_time)
+
+        # wraps the methods before they are handed to the window
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.install_window(self)
+
         # sets up the keyboard events
         # when a key is called the method key_pressed will be called
         self.win.bind_all('<Key>', self.key_pressed)
 
-        # set the current shape to a random new shape
-        self.current_shape = self.create_new_shape()
-
-        # Draw the current_shape oan the board (take a look at the
-        # draw_shape method in the Board class)
-        ####  YOUR CODE HERE ####
-        self.board.draw_shape(self.current_shape)
+        self.view.render(self)
 
-        # For Step 9:  animate the shape!
-        ####  YOUR CODE HERE ####
-        self.animate_shape()
+        # animate the shape!
+        self.win.after(self.FRAME, self.animate_frame)
 
-
-    def create_new_shape(self):
-        ''' Return value: type: Shape
-            
-        Create a random new shape that is centered
-        at y = 0 and x = int(self.BOARD_WIDTH/2)
-        return the shape
+    def animate_frame(self):
+        ''' runs one frame:
+            1. play the keys pressed since the last frame
+            2. move the shape down once for each gravity tick that is due
+            3. draw the game once
+            then waits for the next frame. Both clocks tick at fixed times,
+            so the time a frame takes does not delay the next ones
         '''
+        now = time.monotonic()
+        for key in self.inputs.drain():
+            self.do_move(key)
+            self.record(key)
 
-        #YOUR CODE HERE
-        rand = randrange(0,len(self.SHAPES)) #method inclusive on left end only
-        q = self.SHAPES[rand](Point(int(self.BOARD_WIDTH/2), 0))
-        #q = O_shape(Point(int(self.BOARD_WIDTH/2), 0))
-        return q
-    
-    def animate_shape(self):
-        ''' animate the shape - move down at equal intervals
-            specified by the delay attribute
-        '''
-        
-        self.do_move('Down')
-        self.win.after(self.delay, self.animate_shape)
-    
-    def do_move(self, direction):
-        ''' Parameters: direction - type: string
-            Return value: type: bool
-
-            Move the current shape in the direction specified by the parameter:
-            First check if the shape can move. If it can, move it and return True
-            Otherwise if the direction we tried to move was 'Down',
-            1. add the current shape to the board
-            2. remove the completed rows if any 
-            3. create a new random shape and set current_shape attribute
-            4. If the shape cannot be drawn on the board, display a
-               game over message
+        for i in range(0, self.gravity.due(now)):
+            self.do_move('Down')
+            self.record('gravity')
 
-            return False
-
-        '''
-        
-        #YOUR CODE HERE
-
-        if direction == 'Down':
-            dx = self.DIRECTION[direction][0]
-            dy = self.DIRECTION[direction][1]
-            DOWN_ONE = self.current_shape.can_move(self.board, dx, dy)
-            DOWN_TWO = self.current_shape.can_move(self.board, dx, dy*2)
-
-            if DOWN_ONE:
-                self.current_shape.move(dx,dy) #move down one
-
-            if not DOWN_TWO or not DOWN_ONE:
-                self.board.add_shape(self.current_shape) #add to board
-                self.board.remove_complete_rows()
-                self.current_shape = self.create_new_shape() #new shape added
-                if not self.board.draw_shape(self.current_shape):
-                    self.board.game_over()
-                return False #can no longer move
-            else:
-                return True #has moved
-        elif direction == 'Up':
-            self.do_rotate()
-        else: #direction not down or up
-            dx = self.DIRECTION[direction][0]
-            dy = self.DIRECTION[direction][1]
-            if self.current_shape.can_move(self.board, dx, dy):
-                self.current_shape.move(dx,dy)
-                return True
-            return False
+        self.view.render(self)
 
+        now = time.monotonic()
+        self.frames.due(now)
+        self.win.after(max(1, int(self.frames.wait(now) * 1000)), self.animate_frame)
 
+    def record(self, event):
+        ''' Parameter: event - type: string - one of the replay EVENTS
 
-        #     if DOWN_ONE and not DOWN_TWO: #can move down only once
-        #         self.current_shape.move(dx,dy) #move down one
-        #         print "adding shape"
-        #         self.board.add_shape(self.current_shape) #add to board
-        #         print "added shape"
-        #         print "removing complete rows"
-        #         self.board.remove_complete_rows()
-        #         print "removed"
-        #         self.current_shape = self.create_new_shape() #new shape added
-        #         if not self.board.draw_shape(self.current_shape):
-        #             self.game_over()
-        #         return False #can no longer move
-        #     elif not DOWN_ONE: #can't move down
-        #         print "adding shape"
-        #         self.board.add_shape(self.current_shape) #add to board
-        #         print "added shape"
-        #         print "removing complete rows"
-        #         self.board.remove_complete_rows()
-        #         print "removed"
-        #         self.current_shape = self.create_new_shape() #new shape added
-        #         if not self.board.draw_shape(self.current_shape):
-        #             self.game_over()
-        #         return False #can no longer move
-        #     else: #can move like it wants
-        #         self.current_shape.move(dx,dy)
-        #         return True
-        # else: # dir is not down
-
-
-
-        # if self.current_shape.can_move(self.board, dx, dy):
-        #     self.current_shape.move(dx,dy)
-        #     return True
-        # else:
-        #     print "key_pressed CANNOT move"
-        #     print "direction = ", direction
-        #     if direction == 'Down':
-        #         print "adding shape"
-        #         self.board.add_shape(self.current_shape)
-        #         print "added shape"
-        #         print "removing complete rows"
-        #         self.board.remove_complete_rows()
-        #         print "removed"
-        #         self.current_shape = self.create_new_shape()
-        #         if not self.board.draw_shape(self.current_shape):
-        #             self.game_over()
-
-        #     return False
-
-
-    def do_rotate(self):
-        ''' Checks if the current_shape can be rotated and
-            rotates if it can
+            adds the event that was just played to the replay log
         '''
-        
-        if self.current_shape.can_rotate(self.board):
-            self.current_shape.rotate(self.board)
-    
+        elapsed = int((time.monotonic() - self.start_time) * 1000)
+        self.log.record(event, elapsed, self)
+
     def key_pressed(self, event):
         ''' this function is called when a key is pressed on the keyboard
-            it currenly just prints the value of the key
 
-            Modify the function so that if the user presses the arrow keys
+            if the user presses the arrow keys
             'Left', 'Right' or 'Down', the current_shape will move in
             the appropriate direction
 
@@ -729,17 +299,31 @@ class Tetris():
             if the user presses the 'Up' arrow key ,
                 the shape should rotate.
 
+            the key is only queued; the next frame plays it.
+            Returns True if it was queued, False if the key is not a
+            move or the queue dropped it (see InputQueue.push)
         '''
-            
-        #YOUR CODE HERE
+
         key = event.keysym
-        #print key
-        self.do_move(key)
-       
+        if key not in EVENTS or key == 'gravity':
+            return False
+        return self.inputs.push(key)
+
 ################################################################
 # Start the game
 ################################################################
 
-win = Window("Tetris")
-game = Tetris(win)
-win.mainloop()
+if __name__ == '__main__':
+    # python tetris_template.py [replay file to save the game to]
+    # with TETRIS_METRICS=1 in the environment the game is measured; F12
+    # and the end of the game print the report
+    win = Window("Tetris")
+    metrics = None
+    if os.environ.get('TETRIS_METRICS'):
+        metrics = Metrics()
+    game = TkTetris(win, metrics=metrics)
+    win.mainloop()
+    if len(sys.argv) > 1:
+        game.log.save(sys.argv[1])
+    if metrics is not None:
+        print(metrics.report())
@@ -0,0 +1,245 @@
+import os
+import select
+import sys
+import termios
+import time
+import tty
+
+from tetris_core import COLORS, Tetris
+from tetris_loop import FixedStep, InputQueue
+from tetris_replay import ReplayLog
+
+############################################################
+# TERMINAL VIEW CLASS
+############################################################
+
+### 256 color codes of COLORS, for the background of the squares
+ANSI_COLORS = {'blue': 21, 'orange': 208, 'cyan': 51, 'red': 196,
+               'green': 46, 'yellow': 226, 'magenta': 201}
+
+class TerminalView():
+    ''' TerminalView class: draws a Tetris game on an ANSI terminal,
+        writing only the squares that changed since the last frame
+
+        Attributes: width, height - type:int - size of the board in squares
+                    out - type:file - the terminal, opened in binary mode
+                    shown - type:list - what each square shows on the
+                    terminal, row by row: 0 if empty, color index + 1 for
+                    a block, color index + 9 for the ghost
+                    overlay - type:list - the squares the ghost and the
+                    falling shape were drawn on in the last frame
+                    status - type:bytes - the status line shown
+                    bytes_written - type:int - the bytes of the last frame
+
+        Each square is two characters wide, inside a border drawn once.
+        A frame is one write and one flush: for each changed square, a
+        cursor move unless the cursor is already there, a color change
+        unless the color is already set, and two characters.
+    '''
+
+    def __init__(self, width, height, out):
+        self.width = width
+        self.height = height
+        self.out = out
+        self.shown = [0] * (width * height)
+        self.overlay = []
+        self.status = b''
+        self.bytes_written = 0
+        self.cells = [self.cell_bytes(code) for code in range(0, 2*len(COLORS) + 1)]
+
+    def cell_bytes(self, code):
+        ''' Parameter: code - type: int - as in shown
+            Return value: type: tuple - (the color escape, the two
+                          characters of the square)
+        '''
+        if code == 0:
+            return (b'\x1b[0m', b' .')
+        if code <= len(COLORS):
+            return (b'\x1b[0;48;5;%dm' % ANSI_COLORS[COLORS[code - 1]], b'  ')
+        return (b'\x1b[0;38;5;%dm' % ANSI_COLORS[COLORS[code - len(COLORS) - 1]], b'[]')
+
+    def start(self):
+        ''' clears the terminal, hides the cursor and draws the border
+            and the empty board
+        '''
+        data = [b'\x1b[?25l\x1b[2J\x1b[H\x1b[0m']
+        for y in range(0, self.height):
+            data.append(b'|' + b' .' * self.width + b'|\r\n')
+        data.append(b'+' + b'--' * self.width + b'+\r\n')
+        self.out.write(b''.join(data))
+        self.out.flush()
+
+    def stop(self):
+        ''' puts the cursor under the board and shows it again
+        '''
+        self.out.write(b'\x1b[0m\x1b[%d;1H\x1b[?25h\r\n' % (self.height + 3))
+        self.out.flush()
+
+    def render(self, game):
+        ''' Parameter: game - type: Tetris
+
+            brings the terminal up to date with the game. Only the rows
+            the board changed since the last frame (board.dirty_rows)
+            and the squares of the ghost and the falling shape, old
+            and new, are looked at
+        '''
+        board = game.board
+        width = self.width
+        wanted = {}
+        for y in board.dirty_rows:
+            packed = board.colors[y]
+            for x in range(0, width):
+                wanted[y*width + x] = (packed >> (3 * x)) & 7
+        board.dirty_rows.clear()
+
+        for i in self.overlay:
+            if i not in wanted:
+                wanted[i] = (board.colors[i // width] >> (3 * (i % width))) & 7
+
+        blocks = game.current_shape.get_blocks()
+        color = blocks[0].color
+        overlay = []
+        for x, y in game.get_landing_positions():
+            wanted[y*width + x] = color + 1 + len(COLORS)
+            overlay.append(y*width + x)
+        for block in blocks:
+            wanted[block.y*width + block.x] = color + 1
+            overlay.append(block.y*width + block.x)
+        self.overlay = overlay
+
+        data = []
+        cursor = None
+        color = None
+        for i in sorted(wanted):
+            code = wanted[i]
+            if self.shown[i] == code:
+                continue
+            self.shown[i] = code
+            if cursor != i:
+                # rows and columns start at 1, inside the border
+                data.append(b'\x1b[%d;%dH' % (i // width + 1, 2*(i % width) + 2))
+            escape, characters = self.cells[code]
+            if escape != color:
+                data.append(escape)
+                color = escape
+            data.append(characters)
+            cursor = i + 1 if (i + 1) % width else None
+
+        status = b'lines %d  pieces %d' % (game.lines, game.pieces)
+        if game.board.over:
+            status += b'  GAME OVER (q to quit)'
+        if status != self.status:
+            self.status = status
+            data.append(b'\x1b[0m\x1b[%d;1H\x1b[K' % (self.height + 2) + status)
+
+        frame = b''.join(data)
+        self.bytes_written = len(frame)
+        if frame:
+            self.out.write(frame)
+            self.out.flush()
+
+
+############################################################
+# TERMINAL TETRIS CLASS
+############################################################
+
+### the keys read from the terminal, longest first
+TERMINAL_KEYS = [(b'\x1b[A', 'Up'), (b'\x1b[B', 'Down'), (b'\x1b[C', 'Right'),
+                 (b'\x1b[D', 'Left'), (b' ', 'space'), (b'q', 'quit')]
+
+class TerminalTetris(Tetris):
+    ''' TerminalTetris class: plays a Tetris game in a terminal, with the
+        frame loop of TkTetris
+        Attributes: view - type:TerminalView
+                    delay - type:int - the speed in milliseconds for moving the shapes
+                    log - type:ReplayLog - records the seed and every move of the game
+                    inputs - type:InputQueue - the keys read since the last frame
+                    gravity, frames - type:FixedStep - the clocks of the loop
+                    pending - type:bytes - input bytes not read as a key yet
+                    quit - type:bool - True once 'q' was pressed
+    '''
+
+    FRAME = 16
+
+    def __init__(self, out, seed=None, width=None, height=None):
+        Tetris.__init__(self, seed=seed, width=width, height=height)
+        self.view = TerminalView(self.board.width, self.board.height, out)
+        self.log = ReplayLog(self)
+        self.delay = 1000 #ms
+        self.inputs = InputQueue()
+        self.pending = b''
+        self.quit = False
+
+    def read_keys(self, data):
+        ''' Parameter: data - type: bytes - read from the terminal
+
+            queues the keys in data; unknown bytes are skipped
+        '''
+        data = self.pending + data
+        while data:
+            for sequence, key in TERMINAL_KEYS:
+                if data.startswith(sequence):
+                    if key == 'quit':
+                        self.quit = True
+                    else:
+                        self.inputs.push(key)
+                    data = data[len(sequence):]
+                    break
+            else:
+                if data[:1] == b'\x1b' and len(data) < 3:
+                    break # the rest of the sequence has not come yet
+                data = data[1:]
+        self.pending = data
+
+    def animate_frame(self):
+        ''' runs one frame like TkTetris.animate_frame: the queued keys,
+            the gravity ticks that are due, then one render
+        '''
+        now = time.monotonic()
+        for key in self.inputs.drain():
+            self.do_move(key)
+            self.record(key)
+        for i in range(0, self.gravity.due(now)):
+            self.do_move('Down')
+            self.record('gravity')
+        self.view.render(self)
+
+    def record(self, event):
+        elapsed = int((time.monotonic() - self.start_time) * 1000)
+        self.log.record(event, elapsed, self)
+
+    def run(self, fd):
+        ''' Parameter: fd - type: int - the terminal to read keys from
+
+            plays until 'q' is pressed
+        '''
+        saved = termios.tcgetattr(fd)
+        tty.setcbreak(fd)
+        self.view.start()
+        try:
+            self.start_time = time.monotonic()
+            self.gravity = FixedStep(self.delay / 1000.0, self.start_time)
+            self.frames = FixedStep(self.FRAME / 1000.0, self.start_time)
+            self.view.render(self)
+            while not self.quit:
+                ready = select.select([fd], [], [], self.frames.wait(time.monotonic()))[0]
+                if ready:
+                    self.read_keys(os.read(fd, 1024))
+                if self.frames.due(time.monotonic()):
+                    self.animate_frame()
+        finally:
+            termios.tcsetattr(fd, termios.TCSADRAIN, saved)
+            self.view.stop()
+
+
+################################################################
+# Start the game
+################################################################
+
+if __name__ == '__main__':
+    # python tetris_terminal.py [replay file to save the game to]
+    out = os.fdopen(sys.stdout.fileno(), 'wb', buffering=1 << 16, closefd=False)
+    game = TerminalTetris(out)
+    game.run(sys.stdin.fileno())
+    if len(sys.argv) > 1:
+        game.log.save(sys.argv[1])
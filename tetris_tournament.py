@@ -0,0 +1,259 @@
+import argparse
+import math
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from tetris_core import Tetris
+from tetris_features import FeatureEvaluator
+from tetris_search import find_placements
+
+### points for clearing 0, 1, 2, 3 or 4 rows with one shape
+LINE_SCORES = [0, 40, 100, 300, 1200]
+
+############################################################
+# AGENT CLASSES
+############################################################
+
+class HeuristicAgent():
+    ''' HeuristicAgent class: places each shape where a FeatureEvaluator
+        scores the board it leaves best
+        Attributes: name - type: string
+                    weights - type: dict - feature name -> weight
+    '''
+
+    def __init__(self, name, weights=None):
+        self.name = name
+        self.weights = weights
+        self.evaluator = FeatureEvaluator(weights)
+
+    def choose(self, game, placements):
+        ''' Parameters: game - type: Tetris
+                        placements - type: list of Placement - for the
+                        current shape, not empty
+            Return value: type: Placement
+        '''
+        scores = self.evaluator.score_placements(game.board, placements)
+        return placements[int(np.argmax(scores))]
+
+
+############################################################
+# GAMES
+############################################################
+
+def play_game(agent, seed, max_pieces=1000):
+    ''' Parameters: agent - type: an agent, see HeuristicAgent
+                    seed - type: int - the seed of the game
+                    max_pieces - type: int - the game stops after this
+                    many shapes if it is not over before
+        Return value: type: dict - agent, seed, lines, pieces, score
+                      and time (wall time in seconds)
+
+        plays a game without a window: every shape goes to the placement
+        the agent chooses, with the keys find_placements gives
+    '''
+    start = time.time()
+    game = Tetris(seed=seed)
+    score = 0
+    while not game.board.over and game.pieces < max_pieces:
+        placements = find_placements(game.board, game.current_shape)
+        if not placements:
+            break
+        lines = game.lines
+        for key in agent.choose(game, placements).keys:
+            game.do_move(key)
+        score += LINE_SCORES[min(game.lines - lines, 4)]
+
+    return {'agent': agent.name, 'seed': seed, 'lines': game.lines,
+            'pieces': game.pieces, 'score': score,
+            'time': time.time() - start}
+
+
+def play_task(task):
+    ''' Parameter: task - type: tuple - (agent, seed, max_pieces)
+        Return value: type: dict - see play_game
+
+        the function the worker processes run
+    '''
+    return play_game(*task)
+
+
+def mean_interval(values, z):
+    ''' Parameters: values - type: list of float
+                    z - type: float - the width of the interval in
+                    standard errors
+        Return value: type: tuple - (mean, half width of the confidence
+                      interval), an infinite width for fewer than 2 values
+    '''
+    if not values:
+        return 0.0, float('inf')
+    mean = sum(values) / float(len(values))
+    if len(values) < 2:
+        return mean, float('inf')
+    variance = sum((v - mean)**2 for v in values) / (len(values) - 1)
+    return mean, z * math.sqrt(variance / len(values))
+
+
+############################################################
+# TOURNAMENT CLASS
+############################################################
+
+class Tournament():
+    ''' Tournament class: plays every agent on the same seeds, over a
+        pool of processes
+        Attributes: agents - type: list - the agents, with distinct names
+                    seeds - type: list of int - the games each agent plays
+                    workers - type: int - the number of processes
+                    max_pieces - type: int - see play_game
+                    results - type: dict - agent name -> list of results,
+                    in the order they finished
+                    z - type: float - the width of the confidence intervals
+                    in standard errors (1.96 for 95%)
+                    min_games - type: int - the seeds every agent finishes
+                    before the tournament may stop early
+    '''
+
+    def __init__(self, agents, seeds, workers=None, max_pieces=1000,
+                 z=1.96, min_games=10):
+        names = [agent.name for agent in agents]
+        if len(set(names)) != len(names):
+            raise ValueError("agents need distinct names")
+        self.agents = agents
+        self.seeds = list(seeds)
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pieces = max_pieces
+        self.z = z
+        self.min_games = min_games
+        self.results = dict((name, []) for name in names)
+
+    def run(self):
+        ''' Return value: type: generator of dict - the result of each
+                          game, as soon as it is over
+
+            plays the games seed by seed, each seed by every agent, so the
+            agents are compared on the same shapes. Stops early once
+            separated() is True
+        '''
+        tasks = [(agent, seed, self.max_pieces)
+                 for seed in self.seeds for agent in self.agents]
+        pool = Pool(self.workers)
+        try:
+            for result in pool.imap_unordered(play_task, tasks):
+                self.results[result['agent']].append(result)
+                yield result
+                if self.separated():
+                    break
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def interval(self, name, key='score'):
+        ''' Parameters: name - type: string - the name of an agent
+                        key - type: string - the result to look at
+            Return value: type: tuple - (mean, half width of the
+                          confidence interval)
+        '''
+        return mean_interval([result[key] for result in self.results[name]], self.z)
+
+    def common_seeds(self):
+        ''' Return value: type: list of int - the seeds every agent has
+                          finished
+        '''
+        seeds = None
+        for name in self.results:
+            finished = set(result['seed'] for result in self.results[name])
+            seeds = finished if seeds is None else seeds & finished
+        return sorted(seeds or [])
+
+    def paired_interval(self, first, second, key='score', seeds=None):
+        ''' Parameters: first, second - type: string - names of agents
+                        key - type: string - the result to look at
+                        seeds - type: list of int - common_seeds() if None
+            Return value: type: tuple - (mean, half width of the
+                          confidence interval) of first's result minus
+                          second's, seed by seed
+        '''
+        if seeds is None:
+            seeds = self.common_seeds()
+        values = []
+        by_seed = [dict((result['seed'], result[key]) for result in self.results[name])
+                   for name in (first, second)]
+        for seed in seeds:
+            values.append(by_seed[0][seed] - by_seed[1][seed])
+        return mean_interval(values, self.z)
+
+    def separated(self, key='score'):
+        ''' Return value: type: bool
+
+            True if every agent finished at least min_games of the same
+            seeds and, on those seeds, the confidence interval of the
+            difference between any two agents does not hold 0. Pairing
+            the games by seed takes the luck of the shapes out of the
+            comparison, and agents that finished other seeds than the
+            rest are not compared on those
+        '''
+        if len(self.agents) < 2:
+            return False
+        seeds = self.common_seeds()
+        if len(seeds) < self.min_games:
+            return False
+        names = list(self.results)
+        for i in range(0, len(names)):
+            for other in names[i + 1:]:
+                mean, half = self.paired_interval(names[i], other, key, seeds)
+                if abs(mean) <= half:
+                    return False
+        return True
+
+    def summary(self):
+        ''' Return value: type: list of dict - games, mean lines, pieces,
+                          score with its confidence interval and time for
+                          each agent, best score first
+        '''
+        rows = []
+        for name, results in self.results.items():
+            games = len(results)
+            mean, half = self.interval(name)
+            rows.append({'agent': name, 'games': games, 'score': mean,
+                         'interval': half,
+                         'lines': sum(r['lines'] for r in results) / float(max(games, 1)),
+                         'pieces': sum(r['pieces'] for r in results) / float(max(games, 1)),
+                         'time': sum(r['time'] for r in results)})
+        rows.sort(key=lambda row: -row['score'])
+        return rows
+
+
+################################################################
+# Run a tournament
+################################################################
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="compare Tetris agents")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-pieces', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0, help="the first seed")
+    args = parser.parse_args()
+
+    agents = [HeuristicAgent('default'),
+              HeuristicAgent('no-holes', {'holes': 0.0}),
+              HeuristicAgent('flat', {'bumpiness': -0.5, 'wells': -0.2})]
+    tournament = Tournament(agents, range(args.seed, args.seed + args.games),
+                            args.workers, args.max_pieces)
+    start = time.time()
+    for result in tournament.run():
+        print("%-10s seed %-6d lines %-5d pieces %-5d score %-7d %.2fs"
+              % (result['agent'], result['seed'], result['lines'],
+                 result['pieces'], result['score'], result['time']))
+
+    elapsed = time.time() - start
+    print("")
+    for row in tournament.summary():
+        print("%-10s %4d games  score %9.1f +- %-8.1f lines %7.1f  pieces %7.1f"
+              % (row['agent'], row['games'], row['score'], row['interval'],
+                 row['lines'], row['pieces']))
+    games = sum(row['games'] for row in tournament.summary())
+    print("%d games on %d workers in %.1fs, %.2f games/s"
+          % (games, tournament.workers, elapsed, games / max(elapsed, 1e-9)))